@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import shutil
+import tempfile
+import contextlib
+import importlib.util
+import subprocess
+import ioet_python_challenge as ioet
+
+"""
+Parse the CLI invocation arguments
+
+:returns: returns all the arguments invoked with the script
+"""
+def parse_cli_invocation():
+ parser = argparse.ArgumentParser()
+ parser.add_argument('filename', nargs='?', help="filename which contains labour records, a synthetic one is generated if missing")
+ parser.add_argument('--parsers', action='store_true', help="compare the lines/sec of the record parsers instead of timing each stage")
+ parser.add_argument('--exact', action='store_true', help="compare the shifts/sec of the float and exact integer pricing, and how many cents they differ, instead of timing each stage")
+ parser.add_argument('--startup', action='store_true', help="measure import time and cold-start time of the script instead of timing each stage")
+ parser.add_argument('--baseline', help="copy of the original ioet_python_challenge.py compared by --startup, taken from the first commit of the git repository if not given")
+ parser.add_argument('--runs', type=int, default=10, help="how many times each cold start is measured, the best one is reported")
+ parser.add_argument('--repeat', type=int, default=1, help="how many times the records are parsed by each parser")
+ parser.add_argument('--employees', type=int, default=10000, help="number of records of the synthetic file")
+ parser.add_argument('--shifts-per-employee', type=int, default=10, help="number of shift records of each record of the synthetic file")
+ parser.add_argument('--crossing-ratio', type=float, default=0.3, help="share of shift records crossing time shift intervals")
+ parser.add_argument('--malformed-ratio', type=float, default=0.01, help="share of shift records with out of bounds or incoherent times")
+ parser.add_argument('--duplicate-ratio', type=float, default=0.05, help="share of records repeating a previous employee's name")
+ parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic file, same seed means same file")
+ parser.add_argument('--keep', help="filename where the synthetic file is written, instead of a temporary one")
+ parser.add_argument('--output', help="filename where the JSON report is written, instead of stdout")
+ args = parser.parse_args()
+ return args
+
+"""
+Gets a name complying with customer's format definition (letters only) for an employee number
+
+:param employee_number: integer identifying the employee
+:returns: returns the employee's name
+"""
+def get_synthetic_employee_name(employee_number):
+ name = ''
+ while True:
+  employee_number, letter = divmod(employee_number, 26)
+  name += chr(65+letter)
+  if not employee_number:
+   return 'EMP' + name
+
+"""
+Converts _planar_ minutes into customer's "HH:MM" format, 1440 minutes are turned into "00:00"
+
+:param planar_time: time in _planar_ (minutes) format
+:returns: returns a string complying to "HH:MM" customer's format definition
+"""
+def planar_time_to_time_string(planar_time):
+ return "%02d:%02d" % ((planar_time // 60) % 24, planar_time % 60)
+
+"""
+Generates a random shift record complying with customer's format definition
+
+:param generator: random.Random instance
+:param crossing: True if the shift record must cross at least one time shift interval
+:param malformed: True if the shift record must have out of bounds or incoherent times, so it is skipped when priced
+:returns: returns a string like "MO10:00-12:00"
+"""
+def generate_synthetic_hourly_record(generator, crossing, malformed):
+ day = generator.choice(ioet.DAYS_OF_WEEK)
+ if malformed:
+  if generator.random() < 0.5:
+   return day + "%02d:%02d-%02d:%02d" % (generator.randint(25,99), generator.randint(0,59), generator.randint(25,99), generator.randint(0,59))
+  start_time = generator.randint(61, 1439)
+  return day + planar_time_to_time_string(start_time) + "-" + planar_time_to_time_string(generator.randint(1, start_time-1))
+ time_shifts = list(ioet.BASE_TIMESHIFT_RATE_WAGE.values())
+ if crossing:
+  first, last = sorted(generator.sample(range(len(time_shifts)), 2))
+ else:
+  first = last = generator.randrange(len(time_shifts))
+ start_time = generator.randint(max(time_shifts[first][0], 1), time_shifts[first][1])
+ end_time = generator.randint(max(time_shifts[last][0], start_time), time_shifts[last][1])
+ return day + planar_time_to_time_string(start_time) + "-" + planar_time_to_time_string(end_time)
+
+"""
+Writes a seeded, reproducible, synthetic file of labour records complying with customer's format definition
+
+:param filename: filename where records are written
+:param employees: number of records (lines) written
+:param shifts_per_employee: number of shift records of each record
+:param crossing_ratio: share of shift records crossing time shift intervals
+:param malformed_ratio: share of shift records with out of bounds or incoherent times
+:param duplicate_ratio: share of records repeating a previous employee's name
+:param seed: seed of the random generator
+:returns: returns a dictionary containing the number of lines and shifts written
+"""
+def generate_synthetic_timesheet(filename, employees, shifts_per_employee, crossing_ratio=0.3, malformed_ratio=0.01, duplicate_ratio=0.05, seed=0):
+ generator = random.Random(seed)
+ with open(filename, 'w') as output_file:
+  for employee_number in range(employees):
+   if employee_number and generator.random() < duplicate_ratio:
+    employee_number = generator.randrange(employee_number)
+   hourly_records = [generate_synthetic_hourly_record(generator, generator.random() < crossing_ratio, generator.random() < malformed_ratio) for _ in range(shifts_per_employee)]
+   output_file.write(get_synthetic_employee_name(employee_number) + "=" + ",".join(hourly_records) + "\n")
+ return {'lines': employees, 'shifts': employees * shifts_per_employee}
+
+"""
+Gets the peak resident memory of the present process
+
+:returns: returns the peak resident memory, in kilobytes
+"""
+def get_peak_memory_kb():
+ peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+ return peak_memory // 1024 if sys.platform == 'darwin' else peak_memory
+
+"""
+Times every stage of the reference payroll calculation over a file, output (and skipped records messages) is sent to os.devnull
+
+:param filename: filename which contains labour records
+:returns: returns a dictionary containing lines/sec, shifts/sec, seconds and peak memory of every stage
+"""
+def benchmark_stages(filename):
+ stages = {}
+ with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+  def run_stage(stage, function, *arguments):
+   start = time.perf_counter()
+   result = function(*arguments)
+   stages[stage] = {'seconds': time.perf_counter() - start, 'peak_memory_kb': get_peak_memory_kb()}
+   return result
+  raw_records = run_stage('read_input_file', ioet.read_input_file, filename)
+  employee_records = run_stage('get_data_from_input_file', ioet.get_data_from_input_file, raw_records)
+  paychecks = run_stage('get_weekly_payment_for_all_employees', ioet.get_weekly_payment_for_all_employees, employee_records)
+  run_stage('print_paychecks', ioet.print_paychecks, paychecks)
+ lines = len(raw_records)
+ shifts = sum(len(records) for records in employee_records.values())
+ for stage in stages:
+  stages[stage]['lines_per_second'] = lines / stages[stage]['seconds'] if stages[stage]['seconds'] else None
+  stages[stage]['shifts_per_second'] = shifts / stages[stage]['seconds'] if stages[stage]['seconds'] else None
+ total_seconds = sum(stages[stage]['seconds'] for stage in stages)
+ return {
+  'lines': lines,
+  'shifts': shifts,
+  'employees': len(paychecks),
+  'stages': stages,
+  'total': {'seconds': total_seconds, 'lines_per_second': lines / total_seconds, 'shifts_per_second': shifts / total_seconds, 'peak_memory_kb': get_peak_memory_kb()},
+ }
+
+"""
+Gets the import time of the payroll module, as reported by "python -X importtime", bytecode is cached by a first import when allowed
+
+:param directory: directory where the payroll module (ioet_python_challenge.py) is imported from
+:returns: returns the cumulative import time of the payroll module, in microseconds
+"""
+def measure_import_time_us(directory):
+ subprocess.run([sys.executable, '-c', 'import ioet_python_challenge'], cwd=directory, check=True)
+ importtime = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ioet_python_challenge'], cwd=directory, capture_output=True, text=True, check=True).stderr
+ for line in importtime.splitlines():
+  fields = line.split('|')
+  if len(fields) == 3 and fields[2].strip() == 'ioet_python_challenge':
+   return int(fields[1])
+
+"""
+Gets the best wall time of running a command in a fresh interpreter
+
+:param arguments: python arguments, the interpreter itself excluded
+:param runs: how many times the command is run
+:returns: returns the best wall time, in seconds
+"""
+def measure_cold_start_seconds(arguments, runs):
+ best_seconds = None
+ for _ in range(runs):
+  start = time.perf_counter()
+  subprocess.run([sys.executable] + arguments, cwd=os.path.dirname(os.path.abspath(ioet.__file__)), stdout=subprocess.DEVNULL, check=True)
+  elapsed = time.perf_counter() - start
+  best_seconds = elapsed if best_seconds is None else min(best_seconds, elapsed)
+ return best_seconds
+
+"""
+Gets a copy of the original payroll script, as found in the first commit of the git repository
+
+:param directory: directory where the copy is written
+:returns: returns the filename of the copy
+:raises Exception: raises an exception if git or the repository are not available
+"""
+def get_baseline_script(directory):
+ repository = os.path.dirname(os.path.abspath(ioet.__file__))
+ first_commit = subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=repository, capture_output=True, text=True, check=True).stdout.split()[-1]
+ baseline_script = os.path.join(directory, 'ioet_python_challenge.py')
+ with open(baseline_script, 'w') as baseline_file:
+  baseline_file.write(subprocess.run(['git', 'show', first_commit + ':ioet_python_challenge.py'], cwd=repository, capture_output=True, text=True, check=True).stdout)
+ return baseline_script
+
+"""
+Compares import time and cold-start time of the original script ("before") against the current one ("after")
+The script run directly is always compiled again, so the current one only imports the payroll module, whose bytecode is cached
+
+:param filename: filename which contains labour records
+:param runs: how many times each cold start is measured, the best one is reported
+:param baseline_script: copy of the original script, taken from the first commit of the git repository if None
+:returns: returns a dictionary containing import times (microseconds) and cold-start times (seconds)
+"""
+def benchmark_startup(filename, runs, baseline_script=None):
+ filename = os.path.abspath(filename)
+ script = os.path.join(os.path.dirname(os.path.abspath(ioet.__file__)), 'ioet_python_challenge.py')
+ with tempfile.TemporaryDirectory() as directory:
+  if baseline_script is None:
+   baseline_script = get_baseline_script(directory)
+  else:
+   baseline_script = shutil.copy(baseline_script, os.path.join(directory, 'ioet_python_challenge.py'))
+  return {
+   'import_us': {
+    'before': measure_import_time_us(directory),
+    'after': measure_import_time_us(os.path.dirname(script)),
+   },
+   'cold_start_seconds': {
+    'interpreter_only': measure_cold_start_seconds(['-c', 'pass'], runs),
+    'before_script': measure_cold_start_seconds([baseline_script, filename], runs),
+    'after_script': measure_cold_start_seconds([script, filename], runs),
+    'after_script_argparse': measure_cold_start_seconds([script, '--format', 'text', filename], runs),
+   },
+  }
+
+"""
+Parses a _raw record_ the way the payroll was computed before parse_raw_record existed, used as the reference for the benchmark
+
+:param raw_record: string containing the one-line record of an Employee
+:returns: returns a tuple containing the employee's name and a list of (day, start, end) integer tuples
+"""
+def parse_raw_record_with_current_functions(raw_record):
+ ioet.check_raw_record(raw_record)
+ shifts = []
+ for hourly_record in ioet.get_each_employee_record(raw_record).split(","):
+  day, start_time, end_time = ioet.get_day_and_time_from_hourly_record(hourly_record)
+  try:
+   shifts.append((ioet.get_number_of_day(day), ioet.time_to_planar_time(start_time), ioet.time_to_planar_time(end_time)))
+  except Exception as e:
+   print("Skipping record:", day, start_time, end_time, "Exception:",e)
+ return (ioet.get_employee_name(raw_record), shifts)
+
+"""
+Measures how many lines per second a parser is able to handle
+
+:param parser: function receiving a _raw record_
+:param raw_records: list of _raw records_ to be parsed
+:param repeat: how many times the whole list of _raw records_ is parsed
+:returns: returns the lines per second, as a float
+"""
+def measure_lines_per_second(parser, raw_records, repeat):
+ start = time.perf_counter()
+ for _ in range(repeat):
+  for raw_record in raw_records:
+   parser(raw_record)
+ elapsed = time.perf_counter() - start
+ return (len(raw_records) * repeat) / elapsed
+
+"""
+Compares the lines per second of the current functions against the single-pass parse_raw_record, skipped records messages are sent to os.devnull
+
+:param raw_records: list of _raw records_ to be parsed, all of them must comply to Customer's Definition Format
+:param repeat: how many times the whole list of _raw records_ is parsed by each parser
+:returns: returns a dictionary where tuple format is ("parser":lines_per_second)
+"""
+def benchmark_record_parsers(raw_records, repeat):
+ with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+  return {
+   'current_functions': measure_lines_per_second(parse_raw_record_with_current_functions, raw_records, repeat),
+   'parse_raw_record': measure_lines_per_second(ioet.parse_raw_record, raw_records, repeat),
+  }
+
+"""
+Measures how many shifts per second a payroll function is able to price
+
+:param pricing: function receiving the priced data, and returning the payroll
+:param priced_data: data given to the pricing function
+:param shifts: number of shifts present in the priced data
+:param repeat: how many times the data is priced
+:returns: returns a tuple containing the shifts per second, as a float, and the payroll
+"""
+def measure_shifts_per_second(pricing, priced_data, shifts, repeat):
+ start = time.perf_counter()
+ for _ in range(repeat):
+  payroll = pricing(priced_data)
+ elapsed = time.perf_counter() - start
+ return ((shifts * repeat) / elapsed, payroll)
+
+"""
+Compares the shifts per second of the float pricing against the exact integer pricing, of both the ShiftTable and the NumPy paths (if installed),
+along with how many employees are paid a different amount of cents by each one of them
+Records are parsed once by the validation pass, invalid ones are discarded
+
+:param filename: filename which contains labour records
+:param repeat: how many times the records are priced by each pricing path
+:returns: returns a dictionary containing shifts per second of each path, and the cents differences
+"""
+def benchmark_exact_pricing(filename, repeat):
+ shift_tables = ioet.get_shift_tables_from_input_file_validated(filename, error_report=os.devnull)[0]
+ shifts = sum(len(shift_table) for shift_table in shift_tables.values())
+ ioet.get_wage_table()
+ ioet.get_exact_wage_table()
+ report = {'shifts': shifts}
+ report['float'], float_payroll = measure_shifts_per_second(ioet.get_weekly_payment_for_all_shift_tables, shift_tables, shifts, repeat)
+ report['exact'], exact_payroll = measure_shifts_per_second(lambda shift_tables: ioet.get_weekly_payment_for_all_shift_tables(shift_tables, exact=True), shift_tables, shifts, repeat)
+ if importlib.util.find_spec('numpy'):
+  shift_columns = ioet.get_shift_columns_from_shift_tables(shift_tables)
+  report['vectorized_float'] = measure_shifts_per_second(ioet.get_weekly_payment_for_all_employees_vectorized, shift_columns, shifts, repeat)[0]
+  report['vectorized_exact'] = measure_shifts_per_second(lambda shift_columns: ioet.get_weekly_payment_for_all_employees_vectorized(shift_columns, exact=True), shift_columns, shifts, repeat)[0]
+ cents_differences = [abs(ioet.get_amount_in_cents(float_payroll[employee]) - exact_payroll[employee]) for employee in exact_payroll]
+ report['employees_paid_differently'] = sum(1 for difference in cents_differences if difference)
+ report['max_cents_difference'] = max(cents_differences, default=0)
+ return report
+
+if __name__ == '__main__':
+ arguments = parse_cli_invocation()
+ report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version()}
+ with tempfile.TemporaryDirectory() as directory:
+  filename = arguments.filename
+  if filename is None:
+   filename = arguments.keep or os.path.join(directory, 'synthetic_timesheet.txt')
+   report['synthetic'] = {'employees': arguments.employees, 'shifts_per_employee': arguments.shifts_per_employee, 'crossing_ratio': arguments.crossing_ratio, 'malformed_ratio': arguments.malformed_ratio, 'duplicate_ratio': arguments.duplicate_ratio, 'seed': arguments.seed}
+   generate_synthetic_timesheet(filename, arguments.employees, arguments.shifts_per_employee, arguments.crossing_ratio, arguments.malformed_ratio, arguments.duplicate_ratio, arguments.seed)
+  report['filename'] = filename
+  if arguments.exact:
+   report['exact'] = benchmark_exact_pricing(filename, arguments.repeat)
+  elif arguments.startup:
+   report['startup'] = benchmark_startup(filename, arguments.runs, arguments.baseline)
+  elif arguments.parsers:
+   raw_records = ioet.read_input_file(filename)
+   report['parsers'] = benchmark_record_parsers(raw_records, arguments.repeat)
+   report['parsers']['speedup'] = report['parsers']['parse_raw_record'] / report['parsers']['current_functions']
+  else:
+   report.update(benchmark_stages(filename))
+ output = json.dumps(report, indent=1)
+ if arguments.output:
+  with open(arguments.output, 'w') as output_file:
+   output_file.write(output + "\n")
+ else:
+  print(output)
@@ -0,0 +1,2101 @@
+import os
+import sys
+import time
+from bisect import bisect_right
+CHECK_RAW_RECORD_REGEX = '((^[a-zA-Z]{2,15})=((MO|TU|WE|TH|FR|SA|SU)\d{2}:\d{2}-\d{2}:\d{2}(,)?)+$)'
+GET_EMPLOYEE_NAME_REGEX = '^([a-zA-Z]{2,15})='
+GET_EACH_EMPLOYEE_RECORD_REGEX = '^\w+=(.*)$'
+GET_DAY_AND_TIME_HOURLY_RECORD_REGEX = '^(MO|TU|WE|TH|FR|SA|SU)(\d{2}:\d{2})-(\d{2}:\d{2})$'
+GET_HOUR_AND_MINUTES_REGEX = '^(\d{2}):(\d{2})$'
+DAYS_OF_WEEK = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+BASE_TIMESHIFT_RATE_WAGE = {'Early Morning Shift':(0,540,25/60),'Normal Shift':(541,1080,15/60),'Night Shift':(1081,1440,20/60)}
+EXTRA_WEEKEND_WAGE_PER_MINUTE = 5/60
+RAW_RECORD_REGEX = r'([a-zA-Z]{2,15})=(.+)'
+HOURLY_RECORD_REGEX = r'(MO|TU|WE|TH|FR|SA|SU)(\d{2}):(\d{2})-(\d{2}):(\d{2})'
+COMPILED_REGEXES = {}
+WAGE_TABLE = None
+RATE_TABLE = None
+EXACT_WAGE_TABLE = None
+EXACT_UNITS_PER_CENT = 60
+RATE_TABLE_CACHE_DIRECTORY = '.ioet_rate_table_cache'
+RATE_TABLE_CACHE_VERSION = 2
+NUMBER_OF_DAY = {day: number for number, day in enumerate(DAYS_OF_WEEK, 1)}
+NUMBER_OF_DAY_FROM_BYTES = {(ord(day[0])<<8)|ord(day[1]): number for day, number in NUMBER_OF_DAY.items()}
+ASCII_LETTERS_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+WHITESPACE_BYTES = frozenset(b' \t\r\n\x0b\x0c')
+PAYROLL_CACHE_FILENAME = '.ioet_payroll_cache.sqlite3'
+PAYROLL_CACHE_MAX_ENTRIES = 1000000
+SHIFT_PRICE_CACHE_MAX_ENTRIES = 65536
+PROFILE = None
+OUTPUT_FORMATS = ('text', 'csv', 'jsonl')
+PAYCHECKS_WRITE_BATCH_SIZE = 8192
+PAYROLL_SERVER_HOST = '127.0.0.1'
+PAYROLL_SERVER_PORT = 8765
+PAYROLL_SERVER_BATCH_WINDOW = 0.002
+PAYROLL_SERVER_MAX_BATCH_SIZE = 256
+PAYROLL_SERVER_LATENCY_SAMPLES = 100000
+PAYROLL_SERVER_LINE_LIMIT = 4096
+PAYROLL_ERROR_REPORT_FILENAME = 'ioet_payroll_errors.jsonl'
+INPUT_FILE_CHUNK_BYTES = 1<<24
+
+#https://machinelearningmastery.com/a-gentle-introduction-to-unit-testing-in-python/
+
+"""
+Enables profiling, from now on every stage run through profile_stage and the hot calls counters are recorded in PROFILE
+When profiling is disabled (PROFILE is None) the only overhead is a single check on each hot call
+Note: counters of worker processes (i.e. --workers) are not gathered
+
+:returns: None
+"""
+def enable_profiling():
+ from collections import defaultdict
+ global PROFILE
+ PROFILE = {'stages': {}, 'counters': defaultdict(int)}
+
+"""
+Disables profiling, discarding whatever was recorded
+
+:returns: None
+"""
+def disable_profiling():
+ global PROFILE
+ PROFILE = None
+
+"""
+Adds one to a hot call counter, if profiling is enabled
+
+:param counter: name of the counter
+:returns: None
+"""
+def count_profiled_event(counter):
+ if PROFILE is not None:
+  PROFILE['counters'][counter] += 1
+
+"""
+Records the wall time, calls, records and bytes of a stage that has already run, if profiling is enabled
+
+:param stage: name of the stage
+:param start: time.perf_counter() value taken when the stage started
+:param records: number of records processed by the stage
+:param processed_bytes: number of bytes processed by the stage
+:returns: None
+"""
+def record_profiled_stage(stage, start, records=0, processed_bytes=0):
+ if PROFILE is not None:
+  stage_profile = PROFILE['stages'].setdefault(stage, {'seconds': 0, 'calls': 0, 'records': 0, 'bytes': 0})
+  stage_profile['seconds'] += time.perf_counter() - start
+  stage_profile['calls'] += 1
+  stage_profile['records'] += records
+  stage_profile['bytes'] += processed_bytes
+
+"""
+Runs a stage of the payroll, recording its wall time, calls, records and bytes if profiling is enabled
+Records are the length of the result, or the length of the first argument if the result has no length (i.e. print_paychecks)
+
+:param stage: name of the stage
+:param function: function to run
+:param arguments: arguments of the function
+:param processed_bytes: number of bytes processed by the stage
+:param keyword_arguments: keyword arguments of the function
+:returns: returns whatever the function returns
+"""
+def profile_stage(stage, function, *arguments, processed_bytes=0, **keyword_arguments):
+ if PROFILE is None:
+  return function(*arguments, **keyword_arguments)
+ start = time.perf_counter()
+ result = function(*arguments, **keyword_arguments)
+ measured = result if hasattr(result, '__len__') else (arguments[0] if arguments else ())
+ record_profiled_stage(stage, start, len(measured) if hasattr(measured, '__len__') else 0, processed_bytes)
+ return result
+
+"""
+Gets the machine-readable summary of the profiling
+
+:returns: returns the profile as a JSON string
+"""
+def get_profile_summary():
+ import json
+ return json.dumps(PROFILE, indent=1)
+
+""" 
+Parse the CLI invocation arguments  
+
+:param argv: list of arguments, sys.argv[1:] if None
+:returns: returns all the arguments invoked with the script
+"""
+def parse_cli_invocation(argv=None):
+ import argparse
+ parser = argparse.ArgumentParser()
+ parser.add_argument('filenames', nargs='*', metavar='filename', help="filename which contains labour records, several filenames, globs or directories may be given too")
+ parser.add_argument('--stream', action='store_true', help="read the file lazily, pricing each record and writing paychecks while the file is still being read; output is not de-duplicated, a repeated employee is written again (superseding the previous paycheck) and reported on stderr")
+ parser.add_argument('--vectorized', action='store_true', help="price all the shifts at once with NumPy, useful for huge files")
+ parser.add_argument('--mmap', action='store_true', help="memory-map the file and parse its raw bytes, avoiding a string per line and per shift")
+ parser.add_argument('--workers', type=int, default=0, help="split the file in chunks and price them in parallel with this number of processes")
+ parser.add_argument('--consolidate', action='store_true', help="when several files are given, sum the amounts of every employee across files instead of writing the paychecks of each file")
+ parser.add_argument('--merge-overlaps', action='store_true', help="merge repeated and overlapping shifts of each employee before pricing them, printing the minutes merged away on stderr")
+ parser.add_argument('--shift-cache-size', type=int, default=0, help="memoize the amount of up to this number of repeated shift records in the default pricing path, printing cache statistics at the end")
+ parser.add_argument('--incremental', action='store_true', help="reuse the amounts of the records that did not change since previous runs, stored in a local cache")
+ parser.add_argument('--cache-file', default=PAYROLL_CACHE_FILENAME, help="file where the incremental cache is stored")
+ parser.add_argument('--cache-size', type=int, default=PAYROLL_CACHE_MAX_ENTRIES, help="maximum number of records kept in the incremental cache, least recently used ones are evicted")
+ parser.add_argument('--no-cache', action='store_true', help="do not read nor write the incremental cache, every record is priced again")
+ parser.add_argument('--output', help="file where paychecks are written, instead of stdout")
+ parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text', help="paychecks output format")
+ parser.add_argument('--validate', action='store_true', help="validate every line and shift first, reporting the invalid ones instead of stopping at the first one, in parallel if --workers is given")
+ parser.add_argument('--error-report', help="JSON lines file where --validate reports invalid records (line, byte offset, record and reason), " + PAYROLL_ERROR_REPORT_FILENAME + " by default")
+ parser.add_argument('--error-budget', type=int, help="maximum number of invalid records tolerated by --validate before aborting, no limit by default")
+ parser.add_argument('--exact', action='store_true', help="price in integer fractions of a cent, rounding to the cent only once per employee, instead of adding up floats")
+ parser.add_argument('--rates', help="JSON rate file with the time shift intervals and wages of every day, instead of customer's default ones")
+ parser.add_argument('--profile', action='store_true', help="print a JSON summary of time, calls and records of every stage, and of the hot calls counters, on stderr")
+ parser.add_argument('--serve', action='store_true', help="run a long-running payroll server, pricing the timesheets sent by clients")
+ parser.add_argument('--client', action='store_true', help="send the file to a running payroll server and print its reply")
+ parser.add_argument('--host', default=PAYROLL_SERVER_HOST, help="payroll server host")
+ parser.add_argument('--port', type=int, default=PAYROLL_SERVER_PORT, help="payroll server TCP port")
+ parser.add_argument('--unix-socket', help="payroll server Unix socket, instead of TCP")
+ args = parser.parse_args(argv)
+ inputs, args.filenames = args.filenames, expand_input_filenames(args.filenames)
+ if args.serve and inputs:
+  parser.error("--serve prices the timesheets sent by clients, no filename can be given")
+ if not args.filenames and not args.serve:
+  parser.error("no file found in " + " ".join(inputs) if inputs else "the following arguments are required: filename")
+ if len(args.filenames) > 1 and (args.stream or args.vectorized or args.merge_overlaps or args.shift_cache_size or args.incremental or args.validate or args.client):
+  parser.error("several files can only be priced by the worker pool (--workers), along with --consolidate, --rates, --output, --format and --profile")
+ pricing_paths = [flag for flag, given in (('--stream', args.stream), ('--incremental', args.incremental), ('--vectorized', args.vectorized), ('--workers', args.workers), ('--mmap', args.mmap and not args.workers)) if given]
+ if len(pricing_paths) > 1:
+  parser.error(" and ".join(pricing_paths) + " select different pricing paths, only one of --stream, --incremental, --vectorized, --mmap and --workers can be given (--workers memory-maps the file already)")
+ if args.merge_overlaps and (args.stream or args.incremental or args.vectorized or args.shift_cache_size or ((args.workers or args.mmap) and not args.validate)):
+  parser.error("--merge-overlaps prices shift tables, it can not be combined with --stream, --incremental, --vectorized, --shift-cache-size, nor --workers or --mmap without --validate")
+ if args.validate and (args.stream or args.incremental or args.vectorized or args.shift_cache_size):
+  parser.error("--validate passes valid records to shift tables, it can not be combined with --stream, --incremental, --vectorized nor --shift-cache-size")
+ if not args.validate and (args.error_report is not None or args.error_budget is not None):
+  parser.error("--error-report and --error-budget only apply to --validate")
+ if args.error_report is None:
+  args.error_report = PAYROLL_ERROR_REPORT_FILENAME
+ if args.shift_cache_size and (args.stream or args.incremental or args.vectorized or args.mmap or args.workers or args.serve or args.client):
+  parser.error("--shift-cache-size memoizes the default pricing path, it can not be combined with --stream, --incremental, --vectorized, --mmap, --workers, --serve nor --client")
+ if args.exact and (args.stream or args.incremental or args.shift_cache_size or args.serve or args.client or len(args.filenames) > 1 or ((args.workers or args.mmap) and not args.validate)):
+  parser.error("--exact prices shift tables or NumPy columns, it can not be combined with --stream, --incremental, --shift-cache-size, --serve, --client, several files, nor --workers or --mmap without --validate")
+ args.filename = args.filenames[0] if len(args.filenames) == 1 else None
+ return args
+
+"""
+Expands the input filenames given in the CLI invocation: directories are turned into the files they contain and globs into the files they match,
+both in alphabetical order, any other filename is kept as it is (so a missing file is reported later on)
+An existing file is never taken as a glob, even if its name has glob characters (i.e. "site[1].txt")
+
+:param inputs: list of filenames, globs or directories
+:returns: returns the list of filenames, with no repeated ones
+"""
+def expand_input_filenames(inputs):
+ import glob
+ filenames = []
+ for name in inputs:
+  if os.path.isdir(name):
+   filenames.extend(sorted(os.path.join(name, entry) for entry in os.listdir(name) if os.path.isfile(os.path.join(name, entry))))
+  elif not os.path.exists(name) and any(character in name for character in '*?['):
+   filenames.extend(sorted(filename for filename in glob.glob(name) if os.path.isfile(filename)))
+  else:
+   filenames.append(name)
+ return list(dict.fromkeys(filenames))
+
+"""
+Read each line of input file supplied and return them as a list
+
+:param filename: filename where records are contained
+:returns: returns a list containing the records in the filename indicated
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if any other exception arises
+"""
+def read_input_file(filename):
+ try:
+  list_of_lines = [line.rstrip() for line in open(filename)]
+  return list_of_lines
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading input file:' + str(e))
+
+"""
+Lazily reads each line of input file supplied, yielding them one by one so the whole file is never held in memory
+
+:param filename: filename where records are contained
+:returns: returns a generator over the records in the filename indicated
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if any other exception arises
+"""
+def read_input_file_lazily(filename):
+ try:
+  with open(filename) as input_file:
+   for line in input_file:
+    yield line.rstrip()
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading input file:' + str(e))
+
+"""
+Memory-maps the input file and yields each line as a zero-copy memoryview of the raw bytes, trailing whitespaces excluded
+
+:param filename: filename where records are contained
+:param start: byte offset where reading starts, must be the beginning of a line
+:param end: byte offset where reading stops (lines starting at or after it are not yielded), the whole file if None
+:returns: returns a generator of (offset, line) tuples, where offset is the byte offset of the line and line a memoryview
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if any other exception arises
+"""
+def read_input_file_mmap(filename, start=0, end=None):
+ import mmap
+ try:
+  with open(filename, 'rb') as input_file:
+   if os.fstat(input_file.fileno()).st_size == 0:
+    return
+   buffer = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading input file:' + str(e))
+ view = memoryview(buffer)
+ try:
+  end = len(buffer) if end is None else end
+  offset = start
+  while offset < end:
+   line_end = buffer.find(b'\n', offset)
+   next_offset = len(buffer) if line_end < 0 else line_end + 1
+   line_end = next_offset
+   while line_end > offset and buffer[line_end-1] in WHITESPACE_BYTES:
+    line_end -= 1
+   yield (offset, view[offset:line_end])
+   offset = next_offset
+ finally:
+  try:
+   view.release()
+   buffer.close()
+  except BufferError:
+   # A line is still referenced by the caller, the mapping is released once it is garbage collected
+   pass
+
+"""
+Compiles a RegEx only the first time it is needed, later calls reuse the compiled one (the re module itself is imported on first use too)
+
+:param regex: RegEx to be compiled
+:returns: returns the compiled RegEx
+"""
+def compile_regex(regex):
+ compiled_regex = COMPILED_REGEXES.get(regex)
+ if compiled_regex is None:
+  import re
+  compiled_regex = COMPILED_REGEXES[regex] = re.compile(regex)
+ return compiled_regex
+
+"""
+Performs a RegEx over a text, returning the group specified
+
+:param regex: RegEx to be performed
+:param text:  text that is gonna be _regexed_
+:param group: group that wants to be returned, 0 for whole match
+:returns: returns a string containing the matched characters
+"""
+def regex_search_match(regex, text, group):
+ if PROFILE is not None:
+  PROFILE['counters']['regex_evaluations'] += 1
+ return compile_regex(regex).match(text).group(group)
+
+"""
+Checks if a _raw record_ (just a line in the input file supplied) complies with customer's format definition
+
+:param raw_record: string containing the one-line record of an Employee
+:returns: returns True if raw_record complains with customer's format definition, else False
+"""
+def check_raw_record(raw_record):
+ return regex_search_match(CHECK_RAW_RECORD_REGEX, raw_record, 0)
+
+"""
+Gets the employee's name present in the _raw record_ and returns it as a string
+
+:param raw_record: string containing the one-line record of an Employee
+:returns: returns a string containing the employee's name
+"""
+def get_employee_name(raw_record):
+ return regex_search_match(GET_EMPLOYEE_NAME_REGEX, raw_record, 1)
+
+"""
+Gets the employee's shift records as a comma-separated one-line string, and returns them as a sole string
+
+:param raw_record: string containing the one-line record of an Employee
+:returns: returns a string containing all the employee's shift records as a comma-separated one-line string
+"""
+def get_each_employee_record(raw_record):
+ return regex_search_match(GET_EACH_EMPLOYEE_RECORD_REGEX, raw_record, 1)
+
+"""
+Gets the day, start and end time of a specific employee's shift record, and returns them as a string tuple
+
+:param hourly_record: string according to customer's format definition
+:returns: returns a tuple containing day, start and end time, as string values that will be _casted_ later
+"""
+def get_day_and_time_from_hourly_record(hourly_record):
+ return (regex_search_match(GET_DAY_AND_TIME_HOURLY_RECORD_REGEX, hourly_record, 1), regex_search_match(GET_DAY_AND_TIME_HOURLY_RECORD_REGEX, hourly_record, 2), regex_search_match(GET_DAY_AND_TIME_HOURLY_RECORD_REGEX, hourly_record, 3))
+
+"""
+Converts a pair hours/minutes time string into an integer tuple, "00:00" defined by customer is converted to "24:00" for later _planar_ convertion
+
+:param time_string: a string complying to "HH:MM" format, Customer's definition for "24:00" is "00:00", so this function turns "00:00" into "24:00"
+:returns: returns an hour/minutes integer tuple
+:raises Exception: raises an exception if any hours or minutes value is out of bounds
+"""
+def get_hour_and_minutes_from_time_string(time_string):
+ hour = int(regex_search_match(GET_HOUR_AND_MINUTES_REGEX, time_string, 1))
+ minutes = int(regex_search_match(GET_HOUR_AND_MINUTES_REGEX, time_string, 2))
+ if (hour>24 or minutes>60):
+  raise Exception(str(hour) + " or " + str(minutes) + " are out of bounds, check your input data file, please!")
+ return (hour, minutes)
+
+"""
+Gets each time shift record for each employee from the file supplied, after a customer's definition format check is successful
+
+:param records_from_file: records read from the file supplied
+:returns: returns a dictionary containing all the time shift records of all employees
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_data_from_input_file(records_from_file):
+ from collections import defaultdict
+ results = defaultdict()
+ raw_records = records_from_file
+ try:
+  for raw_record in (raw_records):
+   if check_raw_record(raw_record):
+    results[get_employee_name(raw_record)] = get_each_employee_record(raw_record).split(",")
+  if not results:
+   raise Exception("No records at all, check your input data file, please!")
+  return results
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Converts already tokenized hours and minutes into _planar_ minutes, "00:00" is turned into 1440 minutes, like time_to_planar_time does
+
+:param hours: hours, as a two digit string
+:param minutes: minutes, as a two digit string
+:returns: returns an integer representing the minutes of that specified time
+:raises Exception: raises an exception if any hours or minutes value is out of bounds
+"""
+def planar_time_from_tokens(hours, minutes):
+ hour = int(hours)
+ minute = int(minutes)
+ planar_time = (adjust_0000_to_2400(hour, minute)*60)+minute
+ if (hour>24 or minute>60 or planar_time>1440):
+  raise Exception(str(hour) + " or " + str(minute) + " are out of bounds, check your input data file, please!")
+ return planar_time
+
+"""
+Parses a _raw record_ in a single pass with precompiled RegEx'es, returning the employee's name and his typed shift records
+Every shift is turned into a (day, start, end) integer tuple, where day is 1 for Monday and start/end use _planar_ (minutes) format.
+Note: stricter than check_raw_record, every shift record must be comma separated (no trailing comma either)
+
+:param raw_record: string containing the one-line record of an Employee
+:param errors: optional list where skipped shift records are appended as (shift record, reason) tuples, instead of being printed
+:returns: returns a tuple containing the employee's name and a list of (day, start, end) integer tuples
+:raises Exception: raises an exception if raw_record does not comply with customer's format definition
+"""
+def parse_raw_record(raw_record, errors=None):
+ record_match = compile_regex(RAW_RECORD_REGEX).fullmatch(raw_record)
+ if record_match is None:
+  raise Exception(raw_record + " does not comply with customer's format definition, check your input data file, please!")
+ hourly_record_regex = compile_regex(HOURLY_RECORD_REGEX)
+ shifts = []
+ for hourly_record in record_match.group(2).split(","):
+  hourly_match = hourly_record_regex.fullmatch(hourly_record)
+  if hourly_match is None:
+   raise Exception(raw_record + " does not comply with customer's format definition, check your input data file, please!")
+  day, start_hours, start_minutes, end_hours, end_minutes = hourly_match.groups()
+  try:
+   start_time = planar_time_from_tokens(start_hours, start_minutes)
+   end_time = planar_time_from_tokens(end_hours, end_minutes)
+   record_time_interval_is_coherent(start_time, end_time)
+  except Exception as e:
+   if errors is None:
+    print("Skipping record:", hourly_record, "Exception:",e, file=sys.stderr)
+   else:
+    errors.append((hourly_record, str(e)))
+   count_profiled_event('skipped_records')
+   continue
+  shifts.append((NUMBER_OF_DAY[day], start_time, end_time))
+ return (record_match.group(1), shifts)
+
+"""
+Reads two ASCII digits from raw bytes, returning them as an integer
+
+:param raw_record: bytes-like object (bytes, memoryview, mmap) containing the one-line record of an Employee
+:param position: position of the first digit
+:returns: returns the integer value of both digits, or -1 if any of them is not a digit
+"""
+def two_digits_from_bytes(raw_record, position):
+ tens = raw_record[position] - 48
+ units = raw_record[position+1] - 48
+ if 0 <= tens <= 9 and 0 <= units <= 9:
+  return tens*10 + units
+ return -1
+
+"""
+Parses a _raw record_ straight from its raw bytes, same rules and results as parse_raw_record, but no string is created besides the employee's name
+
+:param raw_record: bytes-like object (bytes, memoryview, mmap slice) containing the one-line record of an Employee
+:param errors: optional list where skipped shift records are appended as (position, reason) tuples, instead of being printed
+:returns: returns a tuple containing the employee's name and a list of (day, start, end) integer tuples
+:raises Exception: raises an exception if raw_record does not comply with customer's format definition
+"""
+def parse_raw_record_bytes(raw_record, errors=None):
+ record_length = len(raw_record)
+ name_length = 0
+ while name_length < record_length and name_length < 16 and raw_record[name_length] in ASCII_LETTERS_BYTES:
+  name_length += 1
+ position = name_length + 1
+ shifts = []
+ while 2 <= name_length <= 15 and position + 13 <= record_length and raw_record[name_length] == 61:
+  day = NUMBER_OF_DAY_FROM_BYTES.get((raw_record[position]<<8)|raw_record[position+1])
+  start_hours, start_minutes = two_digits_from_bytes(raw_record, position+2), two_digits_from_bytes(raw_record, position+5)
+  end_hours, end_minutes = two_digits_from_bytes(raw_record, position+8), two_digits_from_bytes(raw_record, position+11)
+  if day is None or -1 in (start_hours, start_minutes, end_hours, end_minutes) or raw_record[position+4] != 58 or raw_record[position+7] != 45 or raw_record[position+10] != 58:
+   break
+  try:
+   start_time = planar_time_from_tokens(start_hours, start_minutes)
+   end_time = planar_time_from_tokens(end_hours, end_minutes)
+   record_time_interval_is_coherent(start_time, end_time)
+   shifts.append((day, start_time, end_time))
+  except Exception as e:
+   if errors is None:
+    print("Skipping record:", bytes(raw_record[position:position+13]).decode(), "Exception:",e, file=sys.stderr)
+   else:
+    errors.append((position, str(e)))
+   count_profiled_event('skipped_records')
+  position += 13
+  if position == record_length:
+   return (bytes(raw_record[:name_length]).decode(), shifts)
+  if raw_record[position] != 44:
+   break
+  position += 1
+ raise Exception(bytes(raw_record).decode(errors='replace') + " does not comply with customer's format definition, check your input data file, please!")
+
+"""
+Compact struct-of-arrays holding the already parsed shift records of an employee, one unsigned short per value (6 bytes per shift)
+Iterating over it yields (day, start, end) integer tuples, so it can be priced by get_weekly_payment_from_shifts like any list of shifts
+"""
+class ShiftTable:
+ __slots__ = ('days', 'start_times', 'end_times')
+
+ """
+ :param shifts: iterable of (day, start, end) integer tuples, as returned by parse_raw_record
+ """
+ def __init__(self, shifts=()):
+  from array import array
+  self.days = array('H')
+  self.start_times = array('H')
+  self.end_times = array('H')
+  for day, start_time, end_time in shifts:
+   self.append(day, start_time, end_time)
+
+ """
+ Appends a shift record to the table
+
+ :param day: day as an integer, where the 1st. day is Monday
+ :param start_time: time shift start time, using _planar_ (minutes) format
+ :param end_time: time shift end time, using _planar_ (minutes) format
+ :returns: None
+ """
+ def append(self, day, start_time, end_time):
+  self.days.append(day)
+  self.start_times.append(start_time)
+  self.end_times.append(end_time)
+
+ def __len__(self):
+  return len(self.days)
+
+ def __iter__(self):
+  return zip(self.days, self.start_times, self.end_times)
+
+ def __eq__(self, other):
+  return isinstance(other, ShiftTable) and self.days == other.days and self.start_times == other.start_times and self.end_times == other.end_times
+
+ def __repr__(self):
+  return 'ShiftTable(' + repr(list(self)) + ')'
+
+"""
+Gets each time shift record for each employee from the file supplied, parsed once into a ShiftTable
+Note: a repeated employee keeps the shifts of his latest record (same rule as get_data_from_input_file)
+
+:param records_from_file: iterable of _raw records_, i.e. a list or the generator returned by read_input_file_lazily
+:param errors: optional list where skipped shift records are appended, instead of being printed (see parse_raw_record)
+:returns: returns a dictionary containing the ShiftTable of every employee
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_shift_tables_from_input_file(records_from_file, errors=None):
+ results = {}
+ try:
+  for raw_record in records_from_file:
+   employee, shifts = parse_raw_record(raw_record, errors)
+   results[employee] = ShiftTable(shifts)
+  if not results:
+   raise Exception("No records at all, check your input data file, please!")
+  return results
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Checks wether if time shift start time is past (or not) than end time
+
+:param record_start_time: time shift start time, using _planar_ (minutes) format
+:param record_stop_time: time shift end time, using _planar_ (minutes) format
+:returns: True if start time is before than end time, raises an exception otherwise
+:raises Exception: raises an exception if start time is past end time
+
+:TODO: Add Exceptions for handling out of bounds inputs!
+"""
+def record_time_interval_is_coherent(record_start_time, record_end_time):
+ if (record_start_time<=record_end_time):
+  return True
+ else:
+  raise Exception(str(record_start_time)+" as start time is ahead of "+str(record_end_time)+" end time, check your input data file, please!")
+
+"""
+Gets the ordinal number of the day, return it as an integer.
+Customer's definition states week starts on Mondays!
+
+:param day: day in customer's definition format
+:returns: returns the equivalent integer for a day string
+
+:TODO: Add Exceptions for handling out of bounds inputs!
+"""
+def get_number_of_day(day):
+ return DAYS_OF_WEEK.index(day)+1 
+
+"""
+Checks whether a day is a normal one or a weekend one
+Customer's definition states week starts on Mondays!
+
+:param day_of_week: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:returns: returns True if day is weekend one, False otherwise
+
+:TODO: Add Exceptions for handling out of bounds inputs!
+"""
+def is_weekend(day_of_week):
+ return (day_of_week>5)
+
+"""
+Midnight "00:00" in Customer's definiton format shift (start or end) time is converted to midnight "24:00" for later _planar_ convertion
+
+:param hours: hours, in integer cast type
+:param minutes: minutes, in integer cast type
+:returns: returns 24 if "00:00" is supplied, else the original hours value is returned
+
+:TODO: Add Exceptions for handling out of bounds inputs!
+"""
+def adjust_0000_to_2400(hours, minutes):
+ if (hours==0) and (minutes==0):
+ 	return 24
+ else:
+ 	return hours
+
+"""
+Converts "HH:MM" time shift format into _planar_ minutes, for an easy handling of time calculations.
+Also midnight "00:00" shift start or end time defined by customer is converted to midnight "24:00".
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+
+:param time: string complying to "HH:MM" customer's format definition
+:returns: returns an integer representing the minutes of that specified time, if "00:00" is supplied, it is converted to 1440 minutes (a whole day long!)
+"""
+def time_to_planar_time(time):
+ hours, minutes = get_hour_and_minutes_from_time_string(time)
+ return (adjust_0000_to_2400(hours,minutes)*60)+minutes
+
+"""
+Compiled rate table: for every day (Monday first), the sorted start minutes of its time shift intervals, their inclusive ceilings and wages
+per minute, plus the day's extra wage per minute, so the interval of any minute is found with a binary search (O(log intervals))
+The cumulative wage table built from it is kept too, once it has been built
+"""
+class RateTable:
+ __slots__ = ('band_starts', 'band_ceilings', 'band_rates', 'surcharges', 'wage_table')
+
+ """
+ :param bands_of_every_day: list of 7 lists (Monday first) of (start, ceiling, wage per minute) tuples, using _planar_ minutes
+ :param surcharges: list of 7 extra wages per minute (Monday first)
+ :param half_open: if True, ceilings are excluded and every interval starts right at the ceiling of the previous one, so every minute is paid;
+                   if False, ceilings are included and the next interval starts at ceiling+1, so the minute between them is not paid (customer's default intervals)
+ :raises Exception: raises an exception if the time shift intervals of a day do not cover the whole day, one right after the other
+ """
+ def __init__(self, bands_of_every_day, surcharges, half_open=False):
+  if len(bands_of_every_day) != len(DAYS_OF_WEEK) or len(surcharges) != len(DAYS_OF_WEEK):
+   raise Exception("Every day of the week needs its time shift intervals and extra wage, check your rate file, please!")
+  gap = 0 if half_open else 1
+  for day, bands in zip(DAYS_OF_WEEK, bands_of_every_day):
+   next_start = 0
+   for start, ceiling, rate in bands:
+    if start != next_start or ceiling - start < 1 - gap or rate < 0:
+     raise Exception(day + " time shift intervals must go from 0 to 1440 minutes, one right after the other, with no negative wage, check your rate file, please!")
+    next_start = ceiling + gap
+   if next_start != 1440 + gap:
+    raise Exception(day + " time shift intervals must go from 0 to 1440 minutes, one right after the other, with no negative wage, check your rate file, please!")
+  self.band_starts = [[band[0] for band in bands] for bands in bands_of_every_day]
+  self.band_ceilings = [[band[1] for band in bands] for bands in bands_of_every_day]
+  self.band_rates = [[band[2] for band in bands] for bands in bands_of_every_day]
+  self.surcharges = list(surcharges)
+  self.wage_table = None
+
+ """
+ Gets the time shift interval a minute belongs to, through a binary search
+
+ :param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+ :param time: time, using _planar_ (minutes) format
+ :returns: returns the position of the time shift interval among the intervals of that day
+ :raises Exception: raises an exception if time is out of the day (0 to 1440 minutes)
+ """
+ def get_band(self, day, time):
+  if not 0 <= time <= 1440:
+   raise Exception(str(time) + " is out of bounds, check your input data file, please!")
+  return bisect_right(self.band_starts[day-1], time) - 1
+
+ def __eq__(self, other):
+  return isinstance(other, RateTable) and (self.band_starts, self.band_ceilings, self.band_rates, self.surcharges) == (other.band_starts, other.band_ceilings, other.band_rates, other.surcharges)
+
+ def __repr__(self):
+  return 'RateTable(' + repr((self.band_starts, self.band_ceilings, self.band_rates, self.surcharges)) + ')'
+
+"""
+Compiles the rate table defined by customer's wages, BASE_TIMESHIFT_RATE_WAGE on every day plus EXTRA_WEEKEND_WAGE_PER_MINUTE on weekends
+
+:returns: returns the RateTable
+"""
+def get_default_rate_table():
+ bands = sorted(BASE_TIMESHIFT_RATE_WAGE.values())
+ return RateTable([bands] * len(DAYS_OF_WEEK), [EXTRA_WEEKEND_WAGE_PER_MINUTE * is_weekend(day) for day in range(1, len(DAYS_OF_WEEK)+1)])
+
+"""
+Compiles a rate configuration, where wages are given per hour and time shift intervals in _planar_ minutes, from start included to end excluded:
+{"bands": [{"start": 0, "end": 540, "rate": 25}, {"start": 540, ...}, ...], "surcharge": 0, "days": {"SA": {"surcharge": 5}, "WE": {"bands": [...]}}}
+"bands" and "surcharge" apply to every day, unless overridden by that day in "days"
+Every interval starts at the end of the previous one, so unlike customer's default intervals no minute is left unpaid
+
+:param rate_config: dictionary holding the rate configuration, as read from a JSON rate file
+:returns: returns the RateTable
+:raises Exception: raises an exception if the rate configuration is not valid
+"""
+def compile_rate_config(rate_config):
+ day_configs = rate_config.get('days', {})
+ for day in day_configs:
+  if day not in DAYS_OF_WEEK:
+   raise Exception(str(day) + " is not a day in customer's format definition, check your rate file, please!")
+ bands_of_every_day = []
+ surcharges = []
+ for day in DAYS_OF_WEEK:
+  day_config = day_configs.get(day, {})
+  bands = day_config.get('bands', rate_config.get('bands'))
+  if not bands:
+   raise Exception(day + " has no time shift intervals, check your rate file, please!")
+  bands_of_every_day.append([(get_rate_config_number(band.get('start'), day + " time shift interval start", True), get_rate_config_number(band.get('end'), day + " time shift interval end", True), get_rate_config_number(band.get('rate'), day + " wage")/60) for band in bands])
+  surcharges.append(get_rate_config_number(day_config.get('surcharge', rate_config.get('surcharge', 0)), day + " extra wage")/60)
+ return RateTable(bands_of_every_day, surcharges, half_open=True)
+
+"""
+Checks a number of a rate configuration, times must be whole minutes, so they are never truncated
+
+:param value: value read from the rate configuration
+:param name: what the value is, used in the error message
+:param whole: if True, the value must be a whole number
+:returns: returns the value, as an integer if whole
+:raises Exception: raises an exception if the value is not a finite number, or not a whole one when required
+"""
+def get_rate_config_number(value, name, whole=False):
+ import math
+ if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or (whole and not float(value).is_integer()):
+  raise Exception(repr(value) + " is not a valid " + name + (", minutes must be whole numbers" if whole else "") + ", check your rate file, please!")
+ return int(value) if whole else value
+
+"""
+Loads a JSON rate file and compiles it, along with its cumulative wage table
+Compiled rate tables are cached between runs as JSON, keyed by a hash of the rate file, so the same file is only compiled once
+Cached intervals are validated again when loaded, and a cache that can not be read nor written is just ignored
+
+:param filename: JSON rate file, as described in compile_rate_config
+:param cache_directory: directory where compiled rate tables are cached, None to disable the cache
+:returns: returns the RateTable
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if the rate file is not valid
+"""
+def load_rate_table(filename, cache_directory=RATE_TABLE_CACHE_DIRECTORY):
+ import hashlib
+ import json
+ try:
+  with open(filename, 'rb') as rate_file:
+   rate_config = rate_file.read()
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading rate file:' + str(e))
+ cache_filename = os.path.join(cache_directory, hashlib.blake2b(rate_config + bytes([RATE_TABLE_CACHE_VERSION]), digest_size=16).hexdigest() + '.json') if cache_directory else None
+ if cache_filename and os.path.exists(cache_filename):
+  try:
+   with open(cache_filename) as cache_file:
+    cached_rate_table = json.load(cache_file)
+   rate_table = RateTable([list(zip(*bands)) for bands in zip(cached_rate_table['band_starts'], cached_rate_table['band_ceilings'], cached_rate_table['band_rates'])], cached_rate_table['surcharges'], half_open=True)
+   if [len(cumulative_wage) for cumulative_wage in cached_rate_table['wage_table']] == [1441] * len(DAYS_OF_WEEK):
+    rate_table.wage_table = cached_rate_table['wage_table']
+    return rate_table
+  except Exception:
+   # A corrupted cache entry is compiled again, and overwritten
+   pass
+ try:
+  rate_table = compile_rate_config(json.loads(rate_config))
+ except Exception as e:
+  sys.exit('An error occurred during rate table compilation:' + str(e))
+ rate_table.wage_table = build_wage_table(rate_table)
+ if cache_filename:
+  try:
+   os.makedirs(cache_directory, exist_ok=True)
+   with open(cache_filename + '.' + str(os.getpid()), 'w') as cache_file:
+    json.dump({slot: getattr(rate_table, slot) for slot in RateTable.__slots__}, cache_file)
+   os.replace(cache_filename + '.' + str(os.getpid()), cache_filename)
+  except OSError:
+   # i.e. a read-only working directory, the rate table is compiled again next time
+   pass
+ return rate_table
+
+"""
+Gets the active rate table, compiling customer's default one the first time it is needed
+
+:returns: returns the RateTable
+"""
+def get_rate_table():
+ global RATE_TABLE
+ if RATE_TABLE is None:
+  RATE_TABLE = get_default_rate_table()
+ return RATE_TABLE
+
+"""
+Makes a rate table the active one, every amount from now on is calculated with it
+
+:param rate_table: RateTable to be used
+:returns: None
+"""
+def set_rate_table(rate_table):
+ global RATE_TABLE, WAGE_TABLE, EXACT_WAGE_TABLE
+ RATE_TABLE = rate_table
+ WAGE_TABLE = rate_table.wage_table
+ EXACT_WAGE_TABLE = None
+
+"""
+Gets the amount of money of a given time shift, where start and stop times are supplied as strings in customer's format definition "HH:MM", returns payment
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+Note II: This function only works on SAME interval!
+
+:param day: day as customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using customer's format "HH:MM", later will be converted to _planar_ (minutes) format
+:param stop_time: time shift end time, using customer's format "HH:MM", later will be converted to _planar_ (minutes) format
+:returns: returns the amount of money to pay for the present time shift
+
+:TODO: Add Exception Handling when start and end time are NOT on same interval (this is covered in _upper_ funcition!)
+"""
+def get_hourly_payment(day, start_time, end_time):
+ day_of_week = get_number_of_day(day)
+ planar_start_time = time_to_planar_time(start_time)
+ planar_end_time = time_to_planar_time(end_time)
+ if record_time_interval_is_coherent(planar_start_time, planar_end_time):
+  return calculate_hourly_amount(day_of_week, planar_start_time, planar_end_time)
+
+"""
+Gets the amount of money of a given time shift, where start and stop times are supplied as _planar_ (minutes) integers
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using _planar_ (minutes) format
+:param stop_time: time shift end time, using _planar_ (minutes) format
+:returns: returns the amount of money to pay for the present time shift
+"""
+def calculate_basic_wage(day, start_time, end_time):
+ return ((calculate_hourly_wage(day, start_time) + (RATE_TABLE if RATE_TABLE is not None else get_rate_table()).surcharges[day-1]) * (end_time - start_time))
+
+"""
+Gets the specific wage rater per minute given time and day supplied
+
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using _planar_ (minutes) format
+:returns: returns base wage per minute as an float
+"""
+def calculate_hourly_wage(day,start_time):
+ rate_table = RATE_TABLE if RATE_TABLE is not None else get_rate_table()
+ return rate_table.band_rates[day-1][rate_table.get_band(day, start_time)]
+
+"""
+Gets the upper limit of a time shift interval based on the time specified, return it as an integer
+Note: customer's default intervals (BASE_TIMESHIFT_RATE_WAGE) only, whatever the active rate table is, see get_time_shift_band_ceiling
+
+:param time_shift: string representing the time shift interval selected
+:returns: returns the upper limit (as an integer) of the time shift interval selected
+"""
+def get_ceil_time_shift(time_shift):
+ return (BASE_TIMESHIFT_RATE_WAGE[time_shift][1]) 
+
+"""
+Gets the time shift as a string, given a time reference which belongs to that time shift interval
+Note: customer's default intervals (BASE_TIMESHIFT_RATE_WAGE) only, whatever the active rate table is, see get_time_shift_band
+
+:param time: time belonging to the time shift interval, using _planar_ (minutes) format
+:returns: returns the time shift as a string
+"""
+def get_time_shift(time):
+ for time_shift in BASE_TIMESHIFT_RATE_WAGE:
+  if time in range(BASE_TIMESHIFT_RATE_WAGE[time_shift][0], BASE_TIMESHIFT_RATE_WAGE[time_shift][1]+1):
+   return time_shift
+
+"""
+Gets the upper limit of a time shift interval of the active rate table, return it as an integer
+
+:param band: position of the time shift interval selected, as returned by get_time_shift_band
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:returns: returns the upper limit (as an integer) of the time shift interval selected
+"""
+def get_time_shift_band_ceiling(band, day=1):
+ return (RATE_TABLE if RATE_TABLE is not None else get_rate_table()).band_ceilings[day-1][band]
+
+"""
+Gets the start of the time shift interval of the active rate table right after the one specified
+
+:param band: position of the time shift interval, as returned by get_time_shift_band
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:returns: returns the start of the next time shift interval, ceiling+1 for customer's default intervals
+"""
+def get_next_time_shift_band_start(band, day=1):
+ return (RATE_TABLE if RATE_TABLE is not None else get_rate_table()).band_starts[day-1][band+1]
+
+"""
+Gets the time shift interval of the active rate table a time reference belongs to, through a binary search
+
+:param time: time belonging to the time shift interval, using _planar_ (minutes) format
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:returns: returns the position of the time shift interval among the intervals of that day
+"""
+def get_time_shift_band(time, day=1):
+ return (RATE_TABLE if RATE_TABLE is not None else get_rate_table()).get_band(day, time)
+
+"""
+Checks whether if start and end times belong to same time shift interval
+
+:param start_time: time shift start time, using _planar_ (minutes) format
+:param end_time: time shift end time, using _planar_ (minutes) format
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:returns: returns True if both times belong to same time shift interval, False otherwise
+"""
+def same_time_shift(start_time, end_time, day=1):
+ return (get_time_shift_band(start_time, day) == get_time_shift_band(end_time, day))
+
+"""
+Recursive function that returns the amount for a labor time given day, start and end time
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using _planar_ (minutes) format
+:param end_time: time shift end time, using _planar_ (minutes) format
+:param depth: recursion depth, only used for profiling
+:returns: returns (when it reaches the recursive base case!) the amount to pay as a float
+"""
+def calculate_hourly_amount(day, start_time, end_time, depth=1):
+ if PROFILE is not None:
+  PROFILE['counters']['calculate_hourly_amount_calls'] += 1
+  PROFILE['counters']['calculate_hourly_amount_max_depth'] = max(PROFILE['counters']['calculate_hourly_amount_max_depth'], depth)
+ if not same_time_shift(start_time, end_time, day):
+  time_shift_for_present_start_time = get_time_shift_band(start_time, day)
+  time_shift_ceiling_for_present_start_time = get_time_shift_band_ceiling(time_shift_for_present_start_time, day)
+  hourly_amount =  calculate_basic_wage(day, start_time, time_shift_ceiling_for_present_start_time) + calculate_hourly_amount(day, get_next_time_shift_band_start(time_shift_for_present_start_time, day), end_time, depth+1)
+ else:
+  hourly_amount = calculate_basic_wage(day, start_time, end_time)
+ return hourly_amount 
+
+"""
+Builds the cumulative wage table of every day, so any time shift amount is just a subtraction
+Each day holds 1441 cumulative amounts (minute 0 to minute 1440), the weekend extra wage is already included.
+With customer's default intervals, the minute between two of them (i.e. from 540 to 541) is not paid, mirroring calculate_hourly_amount where the next interval starts at ceiling+1
+
+:param rate_table: RateTable whose wages are used, the active one if None
+:returns: returns a list of 7 lists (Monday first) of 1441 cumulative amounts each
+"""
+def build_wage_table(rate_table=None):
+ rate_table = get_rate_table() if rate_table is None else rate_table
+ wage_table = []
+ for day in range(1, len(DAYS_OF_WEEK)+1):
+  band_ceilings, band_rates, surcharge = rate_table.band_ceilings[day-1], rate_table.band_rates[day-1], rate_table.surcharges[day-1]
+  cumulative_wage = [0]
+  for minute in range(1440):
+   band = rate_table.get_band(day, minute)
+   if minute == band_ceilings[band]:
+    cumulative_wage.append(cumulative_wage[-1])
+   else:
+    cumulative_wage.append(cumulative_wage[-1] + (band_rates[band] + surcharge))
+  wage_table.append(cumulative_wage)
+ return wage_table
+
+"""
+Gets the cumulative wage table of the active rate table, building it the first time it is needed
+
+:returns: returns the wage table, as returned by build_wage_table
+"""
+def get_wage_table():
+ global WAGE_TABLE
+ if WAGE_TABLE is None:
+  rate_table = get_rate_table()
+  if rate_table.wage_table is None:
+   rate_table.wage_table = build_wage_table(rate_table)
+  WAGE_TABLE = rate_table.wage_table
+ return WAGE_TABLE
+
+"""
+Gets the amount of money of a given time shift through the precomputed wage table, no matter how many time shift intervals are crossed
+Gives the same amount as calculate_hourly_amount, but with no recursion at all
+
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using _planar_ (minutes) format
+:param end_time: time shift end time, using _planar_ (minutes) format
+:returns: returns the amount to pay for the present time shift
+"""
+def calculate_shift_amount(day, start_time, end_time):
+ cumulative_wage = (WAGE_TABLE if WAGE_TABLE is not None else get_wage_table())[day-1]
+ return cumulative_wage[end_time] - cumulative_wage[start_time]
+
+"""
+Calculates the amount to pay for a specific employee given all of his already parsed labor records
+
+:param shifts: iterable of (day, start, end) integer tuples, as returned by parse_raw_record
+:returns: returns the amount to pay, as a float, to the specific employee
+"""
+def get_weekly_payment_from_shifts(shifts):
+ payment = 0
+ for day, start_time, end_time in shifts:
+  payment += calculate_shift_amount(day, start_time, end_time)
+ return payment
+
+"""
+Converts a wage per minute into an integer number of _exact units_ (1/EXACT_UNITS_PER_CENT of a cent) per minute, i.e. 25/60 USD (25 USD per hour) into 2500
+A cent per hour is an _exact unit_ per minute, so any wage per hour with whole cents is priced with no rounding at all
+
+:param rate: wage per minute, in USD
+:returns: returns the wage per minute, in _exact units_, as an integer
+:raises Exception: raises an exception if the wage per hour has fractions of a cent
+"""
+def get_exact_rate(rate):
+ exact_rate = round(rate * 100 * EXACT_UNITS_PER_CENT)
+ if abs(exact_rate - rate * 100 * EXACT_UNITS_PER_CENT) > 1e-6:
+  raise Exception(str(round(rate * 60, 6)) + " per hour has fractions of a cent, it can not be priced exactly, check your rate file, please!")
+ return exact_rate
+
+"""
+Builds the cumulative wage table of every day in _exact units_, integers only, same layout and rules as build_wage_table
+
+:param rate_table: RateTable whose wages are used, the active one if None
+:returns: returns a list of 7 lists (Monday first) of 1441 cumulative integer amounts each
+:raises Exception: raises an exception if any wage per hour has fractions of a cent
+"""
+def build_exact_wage_table(rate_table=None):
+ rate_table = get_rate_table() if rate_table is None else rate_table
+ wage_table = []
+ for day in range(1, len(DAYS_OF_WEEK)+1):
+  band_ceilings, surcharge = rate_table.band_ceilings[day-1], get_exact_rate(rate_table.surcharges[day-1])
+  band_rates = [get_exact_rate(rate) for rate in rate_table.band_rates[day-1]]
+  cumulative_wage = [0]
+  for minute in range(1440):
+   band = rate_table.get_band(day, minute)
+   cumulative_wage.append(cumulative_wage[-1] + (0 if minute == band_ceilings[band] else band_rates[band] + surcharge))
+  wage_table.append(cumulative_wage)
+ return wage_table
+
+"""
+Gets the cumulative wage table in _exact units_ of the active rate table, building it the first time it is needed
+
+:returns: returns the wage table, as returned by build_exact_wage_table
+:raises Exception: catches an exception if any wage per hour has fractions of a cent
+"""
+def get_exact_wage_table():
+ global EXACT_WAGE_TABLE
+ if EXACT_WAGE_TABLE is None:
+  try:
+   EXACT_WAGE_TABLE = build_exact_wage_table()
+  except Exception as e:
+   sys.exit('An error occurred during rate table compilation:' + str(e))
+ return EXACT_WAGE_TABLE
+
+"""
+Gets the amount of money of a given time shift in _exact units_, through the precomputed exact wage table
+
+:param day: day as an integer, derived from customer's definition format, where the 1st. day is Monday
+:param start_time: time shift start time, using _planar_ (minutes) format
+:param end_time: time shift end time, using _planar_ (minutes) format
+:returns: returns the amount to pay for the present time shift, as an integer
+"""
+def calculate_exact_shift_amount(day, start_time, end_time):
+ cumulative_wage = (EXACT_WAGE_TABLE if EXACT_WAGE_TABLE is not None else get_exact_wage_table())[day-1]
+ return cumulative_wage[end_time] - cumulative_wage[start_time]
+
+"""
+Calculates the amount to pay for a specific employee given all of his already parsed labor records, in _exact units_ (no float at all)
+
+:param shifts: iterable of (day, start, end) integer tuples, as returned by parse_raw_record
+:returns: returns the amount to pay, as an integer, to the specific employee
+"""
+def get_exact_weekly_payment_from_shifts(shifts):
+ payment = 0
+ for day, start_time, end_time in shifts:
+  payment += calculate_exact_shift_amount(day, start_time, end_time)
+ return payment
+
+"""
+Converts an amount in _exact units_ into cents, rounding half-up to the cent only once, at the very end
+
+:param exact_amount: amount in _exact units_, as an integer
+:returns: returns the amount in cents, as an integer
+"""
+def get_cents_from_exact_amount(exact_amount):
+ return (exact_amount + EXACT_UNITS_PER_CENT//2) // EXACT_UNITS_PER_CENT
+
+"""
+Imports NumPy only when a vectorized path is requested, as it is an optional dependency
+
+:returns: returns the numpy module
+:raises ImportError: catches an exception if NumPy is not installed
+"""
+def import_numpy():
+ try:
+  import numpy
+  return numpy
+ except ImportError as e:
+  sys.exit('NumPy is required for vectorized payroll calculation:' + str(e))
+
+"""
+Parses a whole input file into columnar arrays, one item per shift, ready for vectorized pricing, see get_shift_columns_from_raw_bytes
+
+:param filename: filename where records are contained
+:returns: returns a tuple containing the list of employees (index is the employee id) and the employee id, day, start and end time NumPy arrays
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_shift_columns_from_input_file(filename):
+ numpy = import_numpy()
+ try:
+  raw_bytes = numpy.fromfile(filename, dtype=numpy.uint8)
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading input file:' + str(e))
+ try:
+  return get_shift_columns_from_raw_bytes(raw_bytes)
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Parses the raw bytes of a whole input file into columnar arrays, one item per shift, with array operations only: no string is created besides the employees' names
+Shift records have a fixed width (13 bytes, comma separated), so lines, names and every field of every shift are located and checked at once.
+Same rules and results as parse_raw_record: shifts out of bounds or incoherent are skipped (printing the same message on stderr),
+and the first line not complying with customer's format definition is parsed again by parse_raw_record, raising its exception.
+Note: a repeated employee keeps only the shifts of his latest record (same rule as get_data_from_input_file)
+
+:param raw_bytes: bytes-like object containing the whole input file
+:returns: returns a tuple containing the list of employees (index is the employee id) and the employee id, day, start and end time NumPy arrays
+:raises Exception: raises an exception if no records are present, or if a line does not comply with customer's format definition
+"""
+def get_shift_columns_from_raw_bytes(raw_bytes):
+ numpy = import_numpy()
+ raw_bytes = numpy.frombuffer(raw_bytes, dtype=numpy.uint8)
+ size = len(raw_bytes)
+ newlines = numpy.flatnonzero(raw_bytes == 10)
+ line_starts = numpy.concatenate(([0], newlines + 1))
+ line_ends = numpy.concatenate((newlines, [size]))
+ if line_starts[-1] == size:
+  line_starts, line_ends = line_starts[:-1], line_ends[:-1]
+ if not len(line_starts):
+  raise Exception("No records at all, check your input data file, please!")
+ lines = numpy.arange(len(line_starts))
+ # Trailing whitespaces are excluded, like read_input_file_lazily does, only line ends are looked at
+ is_whitespace = numpy.zeros(256, dtype=bool)
+ is_whitespace[list(WHITESPACE_BYTES)] = True
+ trailing_whitespaces = (line_ends > line_starts) & is_whitespace[raw_bytes[numpy.maximum(line_ends - 1, 0)]]
+ while trailing_whitespaces.any():
+  line_ends = line_ends - trailing_whitespaces
+  trailing_whitespaces = (line_ends > line_starts) & is_whitespace[raw_bytes[numpy.maximum(line_ends - 1, 0)]]
+ # Employee's name: 2 to 15 letters followed by the first "=" of the line
+ equal_signs = numpy.flatnonzero(raw_bytes == 61)
+ name_ends = numpy.append(equal_signs, size)[numpy.searchsorted(equal_signs, line_starts)]
+ name_lengths = name_ends - line_starts
+ name_bytes = raw_bytes[numpy.minimum(line_starts[:, None] + numpy.arange(15), size - 1)]
+ outside_name = numpy.arange(15) >= name_lengths[:, None]
+ is_letter = numpy.zeros(256, dtype=bool)
+ is_letter[list(ASCII_LETTERS_BYTES)] = True
+ shifts_lengths = line_ends - name_ends - 1
+ valid_lines = (name_lengths >= 2) & (name_lengths <= 15) & numpy.all(is_letter[name_bytes] | outside_name, axis=1) & (shifts_lengths >= 13) & ((shifts_lengths + 1) % 14 == 0)
+ # Shift records: every field of every shift, one row per shift
+ shift_counts = numpy.where(valid_lines, (shifts_lengths + 1) // 14, 0)
+ shift_lines = numpy.repeat(lines, shift_counts)
+ shift_numbers = numpy.arange(len(shift_lines)) - (numpy.cumsum(shift_counts) - shift_counts)[shift_lines]
+ shift_positions = (name_ends + 1)[shift_lines] + 14 * shift_numbers
+ fields = raw_bytes[shift_positions[:, None] + numpy.arange(13)]
+ number_of_day = numpy.zeros(1<<16, dtype=numpy.uint16)
+ for day_bytes, day in NUMBER_OF_DAY_FROM_BYTES.items():
+  number_of_day[day_bytes] = day
+ days = number_of_day[(fields[:, 0].astype(numpy.uint16) << 8) | fields[:, 1]]
+ digits = fields[:, [2, 3, 5, 6, 8, 9, 11, 12]].astype(numpy.int16) - 48
+ is_last_shift = shift_numbers == shift_counts[shift_lines] - 1
+ well_formed_shifts = (days > 0) & numpy.all((digits >= 0) & (digits <= 9), axis=1) & (fields[:, 4] == 58) & (fields[:, 7] == 45) & (fields[:, 10] == 58) & (is_last_shift | (raw_bytes[numpy.minimum(shift_positions + 13, size - 1)] == 44))
+ valid_lines &= numpy.bincount(shift_lines[~well_formed_shifts], minlength=len(lines)) == 0
+ parsed_lines = len(lines) if valid_lines.all() else int(numpy.argmin(valid_lines))
+ # Times, same rules as planar_time_from_tokens and record_time_interval_is_coherent
+ tokens = digits[:, 0::2] * 10 + digits[:, 1::2]
+ hours, minutes = tokens[:, 0::2], tokens[:, 1::2]
+ planar_times = numpy.where((hours == 0) & (minutes == 0), 24, hours) * 60 + minutes
+ skipped_shifts = numpy.any((hours > 24) | (minutes > 60) | (planar_times > 1440), axis=1) | (planar_times[:, 0] > planar_times[:, 1])
+ for shift in numpy.flatnonzero(skipped_shifts & (shift_lines < parsed_lines)).tolist():
+  hourly_record = raw_bytes[shift_positions[shift]:shift_positions[shift]+13].tobytes().decode()
+  try:
+   record_time_interval_is_coherent(planar_time_from_tokens(hourly_record[2:4], hourly_record[5:7]), planar_time_from_tokens(hourly_record[8:10], hourly_record[11:13]))
+  except Exception as e:
+   print("Skipping record:", hourly_record, "Exception:",e, file=sys.stderr)
+   count_profiled_event('skipped_records')
+ if parsed_lines < len(lines):
+  raw_record = raw_bytes[line_starts[parsed_lines]:line_ends[parsed_lines]].tobytes().decode(errors='replace')
+  parse_raw_record(raw_record)
+  raise Exception(raw_record + " does not comply with customer's format definition, check your input data file, please!")
+ # Employees, in order of appearance, and the latest record of each one of them
+ name_bytes[outside_name] = 0
+ names, first_lines, name_of_line = numpy.unique(name_bytes.view('S15').ravel(), return_index=True, return_inverse=True)
+ order = numpy.argsort(first_lines)
+ employee_ids = numpy.empty(len(order), dtype=numpy.intp)
+ employee_ids[order] = numpy.arange(len(order))
+ employee_of_line = employee_ids[name_of_line.ravel()]
+ latest_line_of_employee = numpy.zeros(len(order), dtype=numpy.intp)
+ numpy.maximum.at(latest_line_of_employee, employee_of_line, lines)
+ kept_shifts = ~skipped_shifts & (latest_line_of_employee[employee_of_line] == lines)[shift_lines]
+ employees = [name.decode() for name in names[order].tolist()]
+ return (employees, employee_of_line[shift_lines][kept_shifts].astype('L'), days[kept_shifts], planar_times[kept_shifts, 0].astype('H'), planar_times[kept_shifts, 1].astype('H'))
+
+"""
+Normalizes the shifts of an employee into a sorted set of non-overlapping shifts per day, so repeated or overlapping minutes are paid only once
+Shifts are sorted by day and start time and then swept once, merging every shift starting before (or right when) the previous one ends: O(n log n).
+Merging shifts that just touch each other does not change the amount to pay, as wage table amounts are additive.
+
+:param shifts: iterable of (day, start, end) integer tuples, using _planar_ (minutes) format, i.e. a ShiftTable
+:returns: returns a tuple containing the merged shifts as a ShiftTable and the number of minutes merged away
+"""
+def merge_overlapping_shifts(shifts):
+ merged_shifts = ShiftTable()
+ merged_minutes = 0
+ current_day, current_start, current_end = None, 0, 0
+ for day, start_time, end_time in sorted(shifts):
+  if day == current_day and start_time <= current_end:
+   merged_minutes += min(end_time, current_end) - start_time
+   current_end = max(end_time, current_end)
+   continue
+  if current_day is not None:
+   merged_shifts.append(current_day, current_start, current_end)
+  current_day, current_start, current_end = day, start_time, end_time
+ if current_day is not None:
+  merged_shifts.append(current_day, current_start, current_end)
+ return (merged_shifts, merged_minutes)
+
+"""
+Calculates the amount to pay to all the employees given their ShiftTable, after merging their repeated and overlapping shifts
+
+:param shift_tables: dictionary containing the ShiftTable of every employee, as returned by get_shift_tables_from_input_file
+:param exact: if True, amounts are added up in _exact units_ and rounded to the cent once per employee, so they are given in cents, as integers
+:returns: returns a tuple containing the amount to pay to each customers and the minutes merged away for each customer, both as dictionaries
+"""
+def get_weekly_payment_for_all_shift_tables_merged(shift_tables, exact=False):
+ payroll = {}
+ merged_minutes = {}
+ for employee in shift_tables:
+  merged_shifts, merged_minutes[employee] = merge_overlapping_shifts(shift_tables[employee])
+  payroll[employee] = get_cents_from_exact_amount(get_exact_weekly_payment_from_shifts(merged_shifts)) if exact else get_weekly_payment_from_shifts(merged_shifts)
+ return (payroll, merged_minutes)
+
+"""
+Turns the ShiftTable of every employee into columnar arrays ready for vectorized pricing, sharing the tables memory instead of parsing again
+
+:param shift_tables: dictionary containing the ShiftTable of every employee, as returned by get_shift_tables_from_input_file
+:returns: returns a tuple containing the list of employees (index is the employee id) and the employee id, day, start and end time NumPy arrays
+"""
+def get_shift_columns_from_shift_tables(shift_tables):
+ numpy = import_numpy()
+ employees = list(shift_tables)
+ tables = [shift_tables[employee] for employee in employees]
+ employee_ids = numpy.repeat(numpy.arange(len(employees)), [len(table) for table in tables])
+ columns = [numpy.concatenate([numpy.frombuffer(getattr(table, column), dtype='H') for table in tables] or [numpy.empty(0, dtype='H')]) for column in ShiftTable.__slots__]
+ return (employees, employee_ids, *columns)
+
+"""
+Calculates the amount to pay to all the employees in one vectorized pass over the wage table, followed by a grouped sum per employee
+get_weekly_payment_for_all_employees remains the reference implementation, both of them must agree on totals
+
+:param shift_columns: tuple as returned by get_shift_columns_from_input_file
+:param exact: if True, amounts are added up in _exact units_ and rounded to the cent once per employee, so they are given in cents, as integers
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+"""
+def get_weekly_payment_for_all_employees_vectorized(shift_columns, exact=False):
+ numpy = import_numpy()
+ employees, employee_ids, days, start_times, end_times = shift_columns
+ day_rows = days.astype(numpy.intp) - 1
+ if exact:
+  wage_table = numpy.array(get_exact_wage_table(), dtype=numpy.int64)
+  payments = numpy.zeros(len(employees), dtype=numpy.int64)
+  numpy.add.at(payments, employee_ids.astype(numpy.intp), wage_table[day_rows, end_times] - wage_table[day_rows, start_times])
+  return {employee: get_cents_from_exact_amount(payment) for employee, payment in zip(employees, payments.tolist())}
+ wage_table = numpy.array(get_wage_table())
+ amounts = wage_table[day_rows, end_times] - wage_table[day_rows, start_times]
+ payments = numpy.bincount(employee_ids.astype(numpy.intp), weights=amounts, minlength=len(employees))
+ return dict(zip(employees, payments.tolist()))
+
+"""
+Bounded LRU cache holding the amount to pay of shift records (i.e. "MO10:00-12:00"), safe to be shared among threads
+Hits, misses and evictions are counted, see get_statistics
+"""
+class ShiftPriceCache:
+ __slots__ = ('max_entries', 'prices', 'lock', 'hits', 'misses', 'evictions')
+
+ """
+ :param max_entries: maximum number of shift records kept, least recently used ones are evicted
+ """
+ def __init__(self, max_entries=SHIFT_PRICE_CACHE_MAX_ENTRIES):
+  import threading
+  from collections import OrderedDict
+  self.max_entries = max_entries
+  self.prices = OrderedDict()
+  self.lock = threading.Lock()
+  self.hits = 0
+  self.misses = 0
+  self.evictions = 0
+
+ """
+ Looks up the amount to pay of a shift record
+
+ :param hourly_record: string according to customer's format definition
+ :returns: returns the amount to pay, or None if the shift record is not cached
+ """
+ def lookup(self, hourly_record):
+  with self.lock:
+   price = self.prices.get(hourly_record)
+   if price is None:
+    self.misses += 1
+   else:
+    self.hits += 1
+    self.prices.move_to_end(hourly_record)
+   return price
+
+ """
+ Stores the amount to pay of a shift record, evicting the least recently used one if the cache is full
+
+ :param hourly_record: string according to customer's format definition
+ :param price: amount to pay for the shift record
+ :returns: None
+ """
+ def store(self, hourly_record, price):
+  with self.lock:
+   self.prices[hourly_record] = price
+   self.prices.move_to_end(hourly_record)
+   if len(self.prices) > self.max_entries:
+    self.prices.popitem(last=False)
+    self.evictions += 1
+
+ """
+ Gets the amount to pay of a shift record, pricing and storing it if it is not cached
+
+ :param hourly_record: string according to customer's format definition
+ :returns: returns the amount to pay for the shift record, or None if it is skipped (see get_hourly_payment_from_hourly_record), nothing is cached then
+ :raises Exception: raises an exception if the shift record does not comply to Customer's Definition Format
+ """
+ def get_price(self, hourly_record):
+  price = self.lookup(hourly_record)
+  if price is None:
+   price = get_hourly_payment_from_hourly_record(hourly_record)
+   if price is not None:
+    self.store(hourly_record, price)
+  return price
+
+ """
+ Gets the cache counters
+
+ :returns: returns a dictionary containing hits, misses, evictions and current entries
+ """
+ def get_statistics(self):
+  with self.lock:
+   return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'entries': len(self.prices)}
+
+"""
+Calculates the amount to pay for a shift record, skipping it (with a message) if its times cannot be priced
+
+:param hourly_record: string according to customer's format definition
+:returns: returns the amount to pay for the shift record, or None if it is skipped
+:raises Exception: raises an exception if the shift record does not comply to Customer's Definition Format
+"""
+def get_hourly_payment_from_hourly_record(hourly_record):
+ day, start_time, end_time = get_day_and_time_from_hourly_record(hourly_record)
+ try: 
+  return get_hourly_payment(day, start_time, end_time)
+ except Exception as e:
+  print("Skipping record:", day, start_time, end_time, "Exception:",e, file=sys.stderr)
+  count_profiled_event('skipped_records')
+  return None
+
+"""
+Calculates the amount to pay for a specific employee given all of his labor records
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+
+:param weekly_employee_records: list of strings, representing all labor records for an specific employee
+:param shift_price_cache: optional ShiftPriceCache, where repeated labor records are priced only once
+:returns: returns the amount to pay, as a float, to the specific employee
+:raises Exception: raises an exception if any labor record does not comply to Customer's Definition Format
+"""
+def get_weekly_payment_for_specific_employee(weekly_employee_records, shift_price_cache=None):
+ payment = 0
+ for hourly_record in weekly_employee_records:
+  hourly_payment = shift_price_cache.get_price(hourly_record) if shift_price_cache is not None else get_hourly_payment_from_hourly_record(hourly_record)
+  if hourly_payment is not None:
+   payment += hourly_payment
+ return payment
+
+"""
+Calculates the amount to pay to all the employees given their ShiftTable, no record is parsed again
+
+:param shift_tables: dictionary containing the ShiftTable of every employee, as returned by get_shift_tables_from_input_file
+:param exact: if True, amounts are added up in _exact units_ and rounded to the cent once per employee, so they are given in cents, as integers
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+"""
+def get_weekly_payment_for_all_shift_tables(shift_tables, exact=False):
+ if exact:
+  return {employee: get_cents_from_exact_amount(get_exact_weekly_payment_from_shifts(shift_tables[employee])) for employee in shift_tables}
+ return {employee: get_weekly_payment_from_shifts(shift_tables[employee]) for employee in shift_tables}
+
+"""
+Calculates the amount to pay to all the employees supplied given all of their labor records
+Note: Customer's Format Definition does not let specify timeshift that spawns over more than one day, i.e. _from Monday 23:00 until Tuesday 02:00
+
+:param weekly_records_of_all_employees: list of strings, representing all labor records of all employees
+:param shift_price_cache: optional ShiftPriceCache, where repeated labor records are priced only once
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+"""
+def get_weekly_payment_for_all_employees(weekly_records_of_all_employees, shift_price_cache=None):
+ from collections import defaultdict
+ payroll = defaultdict(list)
+ for employee in weekly_records_of_all_employees:
+  payroll[employee] = (get_weekly_payment_for_specific_employee(weekly_records_of_all_employees[employee], shift_price_cache))
+ return payroll
+
+"""
+Calculates the amount to pay to each employee as soon as his _raw record_ arrives, yielding it right away
+Note: output is not de-duplicated, a repeated employee is yielded again with the amount of his latest record, which supersedes the previous one (same rule as get_data_from_input_file), and his name is printed on stderr
+
+:param raw_records: iterable of _raw records_, i.e. a list or the generator returned by read_input_file_lazily
+:returns: returns a generator of ("employee", amount) tuples
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def stream_weekly_payment_for_all_employees(raw_records):
+ streamed_records = 0
+ streamed_employees = set()
+ try:
+  for raw_record in raw_records:
+   employee, shifts = parse_raw_record(raw_record)
+   streamed_records += 1
+   if employee in streamed_employees:
+    print("Re-emitted the paycheck of", employee, "superseding the previous one", file=sys.stderr)
+   streamed_employees.add(employee)
+   yield (employee, get_weekly_payment_from_shifts(shifts))
+  if not streamed_records:
+   raise Exception("No records at all, check your input data file, please!")
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Gets a fingerprint of the wage rates, so cached amounts are discarded whenever any rate changes
+
+:returns: returns the fingerprint as an hexadecimal string
+"""
+def get_wage_fingerprint():
+ import hashlib
+ return hashlib.blake2b(repr(get_rate_table()).encode(), digest_size=16).hexdigest()
+
+"""
+Opens (creating it if needed) the on-disk cache holding the amount to pay of every _raw record_ already priced
+
+:param cache_filename: file where the cache is stored
+:returns: returns a sqlite3 connection to the cache
+"""
+def open_payroll_cache(cache_filename):
+ import sqlite3
+ cache = sqlite3.connect(cache_filename)
+ cache.execute('CREATE TABLE IF NOT EXISTS payroll_cache (record_hash TEXT PRIMARY KEY, employee TEXT NOT NULL, payment REAL NOT NULL, last_used INTEGER NOT NULL)')
+ cache.execute('CREATE INDEX IF NOT EXISTS payroll_cache_last_used ON payroll_cache (last_used)')
+ return cache
+
+"""
+Evicts the least recently used records from the cache, until no more than max_entries are kept
+
+:param cache: sqlite3 connection, as returned by open_payroll_cache
+:param max_entries: maximum number of records kept in the cache
+:returns: returns the number of records evicted
+"""
+def evict_payroll_cache(cache, max_entries):
+ exceeding_entries = cache.execute('SELECT COUNT(*) FROM payroll_cache').fetchone()[0] - max_entries
+ if exceeding_entries <= 0:
+  return 0
+ cache.execute('DELETE FROM payroll_cache WHERE record_hash IN (SELECT record_hash FROM payroll_cache ORDER BY last_used LIMIT ?)', (exceeding_entries,))
+ return exceeding_entries
+
+"""
+Calculates the amount to pay to all the employees, pricing only the _raw records_ that are not in the on-disk cache yet
+Each record is keyed by a hash of the whole line and of the wage fingerprint, so a changed line or a changed rate is priced again.
+Note: a repeated employee keeps the amount of his latest record (same rule as get_data_from_input_file)
+
+:param raw_records: iterable of _raw records_, i.e. a list or the generator returned by read_input_file_lazily
+:param cache_filename: file where the cache is stored
+:param max_entries: maximum number of records kept in the cache, least recently used ones are evicted
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_weekly_payment_for_all_employees_incremental(raw_records, cache_filename=PAYROLL_CACHE_FILENAME, max_entries=PAYROLL_CACHE_MAX_ENTRIES):
+ import hashlib
+ payroll = {}
+ wage_fingerprint = get_wage_fingerprint().encode()
+ run_timestamp = time.time_ns()
+ try:
+  cache = open_payroll_cache(cache_filename)
+  with cache:
+   for raw_record in raw_records:
+    record_hash = hashlib.blake2b(wage_fingerprint + raw_record.encode(), digest_size=16).hexdigest()
+    cached_record = cache.execute('SELECT employee, payment FROM payroll_cache WHERE record_hash = ?', (record_hash,)).fetchone()
+    if cached_record:
+     employee, payment = cached_record
+     cache.execute('UPDATE payroll_cache SET last_used = ? WHERE record_hash = ?', (run_timestamp, record_hash))
+    else:
+     employee, shifts = parse_raw_record(raw_record)
+     payment = get_weekly_payment_from_shifts(shifts)
+     cache.execute('INSERT OR REPLACE INTO payroll_cache VALUES (?, ?, ?, ?)', (record_hash, employee, payment, run_timestamp))
+    payroll[employee] = payment
+   evict_payroll_cache(cache, max_entries)
+  cache.close()
+  if not payroll:
+   raise Exception("No records at all, check your input data file, please!")
+  return payroll
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Splits the input file in byte ranges, every one of them starting at the beginning of a line and ending right after a line
+
+:param filename: filename where records are contained
+:param chunks: number of byte ranges wanted, less of them are returned if the file is too small
+:returns: returns a list of (start, end) byte offsets tuples, covering the whole file
+:raises FileNotFoundError: catches an exception if file is not present
+:raises Exception: catches an exception if any other exception arises
+"""
+def split_input_file_in_chunks(filename, chunks):
+ try:
+  file_size = os.path.getsize(filename)
+  boundaries = [0]
+  with open(filename, 'rb') as input_file:
+   for chunk in range(1, chunks):
+    input_file.seek(max(file_size * chunk // chunks, boundaries[-1]))
+    input_file.readline()
+    boundaries.append(min(input_file.tell(), file_size))
+  boundaries.append(file_size)
+  return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ except Exception as e:
+  sys.exit('An error occurred during reading input file:' + str(e))
+
+"""
+Calculates the amount to pay to each employee present in a byte range of the input file, meant to be run inside a worker process
+The byte range is memory-mapped and parsed straight from its raw bytes
+Note: a repeated employee inside the byte range keeps the amount of his latest record (same rule as get_data_from_input_file)
+
+:param chunk: (filename, start, end) tuple, where start and end are byte offsets aligned to line boundaries, end may be None for the whole file
+:returns: returns the partial amount to pay to each customers, as a dictionary where tuple format is ("employee":amount), in order of appearance
+"""
+def get_weekly_payment_for_input_file_chunk(chunk):
+ filename, start, end = chunk
+ payroll = {}
+ for offset, raw_record in read_input_file_mmap(filename, start, end):
+  employee, shifts = parse_raw_record_bytes(raw_record)
+  payroll[employee] = get_weekly_payment_from_shifts(shifts)
+ return payroll
+
+"""
+Calculates the amount to pay to all the employees of the input file, memory-mapping it and parsing its raw bytes in a single process
+
+:param filename: filename where records are contained
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_weekly_payment_for_input_file_mmap(filename):
+ try:
+  payroll = get_weekly_payment_for_input_file_chunk((filename, 0, None))
+  if not payroll:
+   raise Exception("No records at all, check your input data file, please!")
+  return payroll
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Merges the partial payrolls of every byte range, in file order, applying the same rules used for repeated employees in a whole file:
+the employee keeps the position of his first appearance, and the amount of his latest record
+
+:param partial_payrolls: iterable of partial payrolls, in file order, as returned by get_weekly_payment_for_input_file_chunk
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+"""
+def merge_partial_payrolls(partial_payrolls):
+ payroll = {}
+ for partial_payroll in partial_payrolls:
+  payroll.update(partial_payroll)
+ return payroll
+
+"""
+Calculates the amount to pay to all the employees of the input file, pricing byte ranges of it in a pool of processes
+
+:param filename: filename where records are contained
+:param workers: number of processes to be used
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+:raises Exception: raises an exception if no results are present at the end of the execution
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_weekly_payment_for_all_employees_in_parallel(filename, workers):
+ from concurrent.futures import ProcessPoolExecutor
+ chunks = [(filename, start, end) for start, end in split_input_file_in_chunks(filename, workers * 4)]
+ try:
+  with ProcessPoolExecutor(max_workers=workers, initializer=set_rate_table, initargs=(get_rate_table(),)) as executor:
+   payroll = merge_partial_payrolls(executor.map(get_weekly_payment_for_input_file_chunk, chunks))
+  if not payroll:
+   raise Exception("No records at all, check your input data file, please!")
+  return payroll
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Calculates the amount to pay to all the employees of each one of several input files, pricing byte ranges of all of them in a single pool of processes
+The wage table is built once, before the pool starts, and shipped to every process along with the active rate table
+Note: a repeated employee inside a file keeps the amount of his latest record in that file (same rule as get_data_from_input_file)
+
+:param filenames: list of filenames where records are contained
+:param workers: number of processes to be used
+:returns: returns a dictionary with the payroll of each file, in the order given, as a dictionary where tuple format is ("employee":amount)
+:raises FileNotFoundError: catches an exception if any file is not present
+:raises Exception: raises an exception if no results are present for any one of the files, telling which one
+:raises Exception: catches an exception if any unplanned situation occurs, telling the file it comes from
+"""
+def get_weekly_payment_for_input_files(filenames, workers):
+ from concurrent.futures import ProcessPoolExecutor
+ try:
+  chunks = [(filename, start, end) for filename in filenames for start, end in split_input_file_in_chunks(filename, os.path.getsize(filename) // INPUT_FILE_CHUNK_BYTES + 1)]
+ except FileNotFoundError as e:
+  sys.exit('File does not exist:' + str(e))
+ get_wage_table()
+ payrolls = {filename: {} for filename in filenames}
+ try:
+  with ProcessPoolExecutor(max_workers=workers, initializer=set_rate_table, initargs=(get_rate_table(),)) as executor:
+   partial_payrolls = [executor.submit(get_weekly_payment_for_input_file_chunk, chunk) for chunk in chunks]
+   for (filename, start, end), partial_payroll in zip(chunks, partial_payrolls):
+    try:
+     payrolls[filename].update(partial_payroll.result())
+    except Exception as e:
+     executor.shutdown(cancel_futures=True)
+     raise Exception(filename + ': ' + str(e))
+  for filename in payrolls:
+   if not payrolls[filename]:
+    raise Exception(filename + ': No records at all, check your input data file, please!')
+  return payrolls
+ except Exception as e:
+  sys.exit('An error occurred during information parsing:' + str(e))
+
+"""
+Consolidates the payrolls of several files, summing up the amounts of every employee across files
+The employee keeps the position of his first appearance
+
+:param payrolls: dictionary with the payroll of each file, as returned by get_weekly_payment_for_input_files
+:returns: returns the amount to pay to each customers, as a dictionary where tuple format is ("employee":amount)
+"""
+def consolidate_payrolls(payrolls):
+ consolidated_payroll = {}
+ for payroll in payrolls.values():
+  for employee in payroll:
+   consolidated_payroll[employee] = consolidated_payroll.get(employee, 0) + payroll[employee]
+ return consolidated_payroll
+
+"""
+Validates every line and shift record present in a byte range of the input file, in a single pass, meant to be run inside a worker process
+Nothing is printed nor raised for invalid records, they are returned instead, so a bad line never stops the run
+
+:param chunk: (filename, start, end) tuple, where start and end are byte offsets aligned to line boundaries, end may be None for the whole file
+:param error_budget: maximum number of invalid records tolerated, validation stops as soon as the byte range alone goes beyond it, None for no limit
+:returns: returns a tuple containing the ShiftTable of the valid shifts of every employee (a repeated employee keeps his latest record),
+          the number of lines read, and a list of (line, offset, record, reason) tuples for every invalid line or shift,
+          where line is counted from 1 at the beginning of the byte range and offset is the byte offset in the file
+"""
+def validate_input_file_chunk(chunk, error_budget=None):
+ filename, start, end = chunk
+ shift_tables = {}
+ invalid_records = []
+ lines = 0
+ for offset, raw_record in read_input_file_mmap(filename, start, end):
+  lines += 1
+  shift_errors = []
+  try:
+   employee, shifts = parse_raw_record_bytes(raw_record, shift_errors)
+  except Exception:
+   invalid_records.append((lines, offset, bytes(raw_record).decode(errors='replace'), "does not comply with customer's format definition"))
+  else:
+   for position, reason in shift_errors:
+    invalid_records.append((lines, offset + position, bytes(raw_record[position:position+13]).decode(), reason))
+   shift_tables[employee] = ShiftTable(shifts)
+  if error_budget is not None and len(invalid_records) > error_budget:
+   break
+ return (shift_tables, lines, invalid_records)
+
+"""
+Validates every line and shift record of the input file in a single pass, optionally in a pool of processes, writing every invalid one
+to a JSON lines error report ({"line", "offset", "record", "reason"}, in file order), and passing only valid records downstream
+Invalid lines are dropped whole, invalid shifts are dropped from otherwise valid lines
+
+:param filename: filename where records are contained
+:param workers: number of processes to be used, 0 to validate the file in the current process
+:param error_report: file where invalid records are reported, PAYROLL_ERROR_REPORT_FILENAME by default
+:param error_budget: maximum number of invalid records tolerated before aborting, None for no limit
+:returns: returns a tuple containing the ShiftTable of every employee, as get_shift_tables_from_input_file does, and the number of invalid records
+:raises Exception: raises an exception if there are more invalid records than error_budget, or no valid records at all
+:raises Exception: catches an exception if any unplanned situation occurs
+"""
+def get_shift_tables_from_input_file_validated(filename, workers=0, error_report=PAYROLL_ERROR_REPORT_FILENAME, error_budget=None):
+ import json
+ from concurrent.futures import ProcessPoolExecutor
+ executor = ProcessPoolExecutor(max_workers=workers, initializer=set_rate_table, initargs=(get_rate_table(),)) if workers > 0 else None
+ chunks = [(filename, start, end) for start, end in split_input_file_in_chunks(filename, workers * 4)] if executor else [(filename, 0, None)]
+ shift_tables = {}
+ invalid_records = 0
+ lines = 0
+ try:
+  with open(error_report, 'w', buffering=1<<20) as report:
+   for chunk_shift_tables, chunk_lines, chunk_invalid_records in (executor.map if executor else map)(validate_input_file_chunk, chunks, [error_budget] * len(chunks)):
+    for line, offset, record, reason in chunk_invalid_records:
+     report.write(json.dumps({'line': lines + line, 'offset': offset, 'record': record, 'reason': reason}) + "\n")
+    lines += chunk_lines
+    invalid_records += len(chunk_invalid_records)
+    if error_budget is not None and invalid_records > error_budget:
+     raise Exception("More than " + str(error_budget) + " invalid records, see " + error_report + " for details")
+    shift_tables.update(chunk_shift_tables)
+  if not shift_tables:
+   raise Exception("No records at all, check your input data file, please!")
+  return (shift_tables, invalid_records)
+ except Exception as e:
+  sys.exit('An error occurred during information validation:' + str(e))
+ finally:
+  if executor:
+   executor.shutdown(cancel_futures=True)
+
+"""
+Prints the amount to pay to a single employee, according to Customer's Definition Format for data output
+
+:param employee: employee's name
+:param amount: amount to pay to the employee
+:returns: None
+"""
+def print_paycheck(employee, amount):
+ print("The amount to pay",employee,"is:","%.2f" % amount,"USD")
+
+"""
+Prints the amount to pay to each employee, according to Customer's Definition Format for data output
+Note: cents are two decimals rounded, future version may consider changing amount format where cents are part of a tuple of integers
+
+:param paychecks: amount to pay to each customer, as a dictionary, where tuple format is ("employee":amount) 
+:returns: None
+"""
+def print_paychecks(paychecks):
+ for employee in paychecks:
+  print_paycheck(employee, paychecks[employee])
+
+"""
+Rounds an amount to exact cents (half cents are rounded up, away from zero), as if it was rounded on its decimal representation instead of binary floats
+Integer arithmetic is enough for a float unless it is within a thousandth of a cent of a half cent, then its shortest decimal representation is rounded exactly, as any Decimal is
+
+:param amount: amount to pay, as a float, an int or a Decimal
+:returns: returns the amount in cents, as an integer
+"""
+def get_amount_in_cents(amount):
+ if isinstance(amount, int):
+  return amount * 100
+ if isinstance(amount, float):
+  cents = abs(amount) * 100
+  whole_cents = int(cents)
+  if abs(cents - whole_cents - 0.5) >= 0.001:
+   if cents - whole_cents > 0.5:
+    whole_cents += 1
+   return -whole_cents if amount < 0 else whole_cents
+ from decimal import Decimal, ROUND_HALF_UP
+ return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+"""
+Formats an amount in cents as a decimal string with two decimals, i.e. 21500 is turned into "215.00"
+
+:param cents: amount in cents, as an integer
+:returns: returns the amount as a string
+"""
+def format_cents(cents):
+ return ('-' if cents < 0 else '') + '%d.%02d' % divmod(abs(cents), 100)
+
+"""
+Formats a batch of paychecks in the selected output format
+
+:param paychecks: list of ("employee", amount) tuples
+:param output_format: one of OUTPUT_FORMATS, "text" is Customer's Definition Format for data output
+:param filename: input file the paychecks come from, added as a first "file" column (csv) or field (jsonl), ignored by "text"
+:param in_cents: whether amounts are already integer cents (i.e. priced with exact=True), written as they are instead of being rounded
+:returns: returns the formatted paychecks as a single string
+"""
+def format_paychecks(paychecks, output_format, filename=None, in_cents=False):
+ get_cents = int if in_cents else get_amount_in_cents
+ if output_format == 'csv':
+  import io
+  import csv
+  formatted_paychecks = io.StringIO()
+  sources = (filename,) if filename is not None else ()
+  csv.writer(formatted_paychecks, lineterminator='\n').writerows(sources + (employee, format_cents(get_cents(amount)), 'USD') for employee, amount in paychecks)
+  return formatted_paychecks.getvalue()
+ if output_format == 'jsonl':
+  import json
+  sources = {'file': filename} if filename is not None else {}
+  return ''.join(json.dumps({**sources, 'employee': employee, 'amount': format_cents(get_cents(amount)), 'currency': 'USD'}) + '\n' for employee, amount in paychecks)
+ return ''.join('The amount to pay ' + employee + ' is: ' + format_cents(get_cents(amount)) + ' USD\n' for employee, amount in paychecks)
+
+"""
+Writes the amount to pay to each employee in large buffered batches, so output is written while the payroll is still being calculated if a generator is supplied
+
+:param paychecks: dictionary where tuple format is ("employee":amount), or an iterable of ("employee", amount) tuples (i.e. stream_weekly_payment_for_all_employees)
+:param output_file: file object where paychecks are written, stdout if None
+:param output_format: one of OUTPUT_FORMATS, "text" is Customer's Definition Format for data output
+:param batch_size: number of paychecks written at once
+:param filename: input file the paychecks come from, as in format_paychecks
+:param header: whether the csv header is written
+:param in_cents: whether amounts are already integer cents, as in format_paychecks
+:returns: returns the number of paychecks written
+"""
+def write_paychecks(paychecks, output_file=None, output_format='text', batch_size=PAYCHECKS_WRITE_BATCH_SIZE, filename=None, header=True, in_cents=False):
+ output_file = sys.stdout if output_file is None else output_file
+ if output_format == 'csv' and header:
+  output_file.write(('file,' if filename is not None else '') + 'employee,amount,currency\n')
+ written_paychecks = 0
+ batch = []
+ for paycheck in (paychecks.items() if isinstance(paychecks, dict) else paychecks):
+  batch.append(paycheck)
+  if len(batch) >= batch_size:
+   output_file.write(format_paychecks(batch, output_format, filename, in_cents))
+   written_paychecks += len(batch)
+   batch = []
+ output_file.write(format_paychecks(batch, output_format, filename, in_cents))
+ output_file.flush()
+ return written_paychecks + len(batch)
+
+"""
+Writes the paychecks of several files: in "text" format each file is preceded by a "==> filename <==" header,
+in "csv" and "jsonl" formats every paycheck tells the file it comes from, so the output is still a single valid CSV or JSON lines file
+
+:param payrolls: dictionary with the payroll of each file, as returned by get_weekly_payment_for_input_files
+:param output_file: file object where paychecks are written, stdout if None
+:param output_format: one of OUTPUT_FORMATS
+:returns: returns the number of paychecks written
+"""
+def write_paychecks_of_files(payrolls, output_file=None, output_format='text'):
+ output_file = sys.stdout if output_file is None else output_file
+ written_paychecks = 0
+ for position, filename in enumerate(payrolls):
+  if output_format == 'text':
+   output_file.write('==> ' + filename + ' <==\n')
+   written_paychecks += write_paychecks(payrolls[filename], output_file, output_format)
+  else:
+   written_paychecks += write_paychecks(payrolls[filename], output_file, output_format, filename=filename, header=position == 0)
+ return written_paychecks
+
+"""
+Calculates the amount to pay to all the employees of several timesheets at once, used by PayrollServer to price a batch of requests
+
+:param timesheets: list of timesheets, each one of them a list of _raw records_
+:returns: returns a list with, for each timesheet, a tuple containing its payroll, as a dictionary where tuple format is ("employee":amount),
+          and its skipped shift records, as a list of (shift record, reason) tuples; or an Exception if it could not be priced
+"""
+def get_weekly_payment_for_timesheets(timesheets):
+ payrolls = []
+ for raw_records in timesheets:
+  skipped_records = []
+  try:
+   payrolls.append((get_weekly_payment_for_all_shift_tables(get_shift_tables_from_input_file(raw_records, skipped_records)), skipped_records))
+  except SystemExit as e:
+   payrolls.append(Exception(str(e.code)))
+ return payrolls
+
+"""
+Formats the skipped shift records of a timesheet the same way they are printed when a file is priced, one per line
+
+:param skipped_records: list of (shift record, reason) tuples
+:returns: returns the skipped shift records as a string
+"""
+def format_skipped_records(skipped_records):
+ return ''.join("Skipping record: " + hourly_record + " Exception: " + reason + "\n" for hourly_record, reason in skipped_records)
+
+"""
+Long-running asyncio payroll server, so the interpreter start-up and the wage table are paid only once
+A client sends the _raw records_ of a timesheet, one per line, ended by an empty line (or by closing its writing side), and gets the paychecks
+in Customer's Definition Format for data output, followed by a "Skipping record: ..." line for every shift record skipped.
+Sending the single line "STATS" returns the latency statistics as JSON.
+Requests arriving within the same batch window are priced together, in a single call run outside the event loop.
+"""
+class PayrollServer:
+ __slots__ = ('batch_window', 'max_batch_size', 'line_limit', 'pending_requests', 'pricing_task', 'latencies', 'requests', 'batches')
+
+ """
+ :param batch_window: seconds waited for more requests once the first one of a batch arrives
+ :param max_batch_size: maximum number of requests priced together
+ :param line_limit: maximum length of a timesheet line sent by a client, in bytes
+ """
+ def __init__(self, batch_window=PAYROLL_SERVER_BATCH_WINDOW, max_batch_size=PAYROLL_SERVER_MAX_BATCH_SIZE, line_limit=PAYROLL_SERVER_LINE_LIMIT):
+  from collections import deque
+  self.batch_window = batch_window
+  self.max_batch_size = max_batch_size
+  self.line_limit = line_limit
+  self.pending_requests = None
+  self.pricing_task = None
+  self.latencies = deque(maxlen=PAYROLL_SERVER_LATENCY_SAMPLES)
+  self.requests = 0
+  self.batches = 0
+
+ """
+ Starts listening on a Unix socket, or on a TCP host and port, and starts pricing batches
+
+ :param host: TCP host
+ :param port: TCP port, 0 lets the OS choose one
+ :param unix_socket: Unix socket path, used instead of TCP if supplied
+ :returns: returns the asyncio.Server listening
+ """
+ async def start(self, host=PAYROLL_SERVER_HOST, port=PAYROLL_SERVER_PORT, unix_socket=None):
+  import asyncio
+  self.pending_requests = asyncio.Queue()
+  self.pricing_task = asyncio.get_running_loop().create_task(self.price_batches())
+  if unix_socket:
+   return await asyncio.start_unix_server(self.handle_client, unix_socket, limit=self.line_limit)
+  return await asyncio.start_server(self.handle_client, host, port, limit=self.line_limit)
+
+ """
+ Stops pricing batches, to be awaited once the asyncio.Server returned by start is closed
+
+ :returns: None
+ """
+ async def stop(self):
+  import asyncio
+  if self.pricing_task is not None:
+   self.pricing_task.cancel()
+   try:
+    await self.pricing_task
+   except asyncio.CancelledError:
+    pass
+   self.pricing_task = None
+
+ """
+ Reads a timesheet from a client, waits for its batch to be priced and replies with the paychecks
+ A line longer than line_limit, or which is not valid text, is replied with an error instead
+
+ :param reader: asyncio.StreamReader of the client
+ :param writer: asyncio.StreamWriter of the client
+ :returns: None
+ """
+ async def handle_client(self, reader, writer):
+  import json
+  import asyncio
+  raw_records = []
+  try:
+   while True:
+    line = await reader.readline()
+    if not line.strip():
+     break
+    raw_records.append(line.decode().rstrip())
+  except (ValueError, asyncio.LimitOverrunError) as e:
+   raw_records = None
+   reply = 'An error occurred during reading the timesheet:' + str(e) + "\n"
+  start = time.perf_counter()
+  if raw_records == ['STATS']:
+   reply = json.dumps(self.get_latency_statistics()) + "\n"
+  elif raw_records is not None:
+   payroll = asyncio.get_running_loop().create_future()
+   await self.pending_requests.put((raw_records, payroll))
+   try:
+    priced_payroll, skipped_records = await payroll
+    reply = format_paychecks(list(priced_payroll.items()), 'text') + format_skipped_records(skipped_records)
+   except Exception as e:
+    reply = str(e) + "\n"
+   self.latencies.append(time.perf_counter() - start)
+   self.requests += 1
+  writer.write(reply.encode())
+  await writer.drain()
+  writer.close()
+  await writer.wait_closed()
+
+ """
+ Endlessly gathers the pending requests of a batch window and prices them together with get_weekly_payment_for_timesheets
+
+ :returns: None
+ """
+ async def price_batches(self):
+  import asyncio
+  loop = asyncio.get_running_loop()
+  while True:
+   batch = [await self.pending_requests.get()]
+   await asyncio.sleep(self.batch_window)
+   while len(batch) < self.max_batch_size and not self.pending_requests.empty():
+    batch.append(self.pending_requests.get_nowait())
+   try:
+    payrolls = await loop.run_in_executor(None, get_weekly_payment_for_timesheets, [raw_records for raw_records, payroll in batch])
+   except Exception as e:
+    payrolls = [Exception('An error occurred during information parsing:' + str(e))] * len(batch)
+   for (raw_records, payroll), priced_payroll in zip(batch, payrolls):
+    if payroll.done():
+     # The client went away (its request was cancelled) while the batch was priced
+     continue
+    if isinstance(priced_payroll, Exception):
+     payroll.set_exception(priced_payroll)
+    else:
+     payroll.set_result(priced_payroll)
+   self.batches += 1
+
+ """
+ Gets the latency statistics of the priced requests (from the whole timesheet being read to its reply being ready)
+
+ :returns: returns a dictionary containing requests, batches, p50 and p99 latencies in milliseconds
+ """
+ def get_latency_statistics(self):
+  latencies = sorted(self.latencies)
+  def percentile(share):
+   return round(latencies[min(len(latencies)-1, int(len(latencies)*share))]*1000, 3) if latencies else None
+  return {'requests': self.requests, 'batches': self.batches, 'p50_ms': percentile(0.50), 'p99_ms': percentile(0.99)}
+
+"""
+Runs a PayrollServer until it is interrupted, printing its latency statistics on stderr at the end
+
+:param host: TCP host
+:param port: TCP port
+:param unix_socket: Unix socket path, used instead of TCP if supplied
+:returns: None
+"""
+def run_payroll_server(host=PAYROLL_SERVER_HOST, port=PAYROLL_SERVER_PORT, unix_socket=None):
+ import json
+ import asyncio
+ payroll_server = PayrollServer()
+ async def serve():
+  server = await payroll_server.start(host, port, unix_socket)
+  try:
+   async with server:
+    await server.serve_forever()
+  finally:
+   await payroll_server.stop()
+ try:
+  asyncio.run(serve())
+ except KeyboardInterrupt:
+  pass
+ print("Payroll server latency:", json.dumps(payroll_server.get_latency_statistics()), file=sys.stderr)
+
+"""
+Sends a timesheet to a running PayrollServer and gets its reply
+
+:param raw_records: iterable of _raw records_
+:param host: TCP host
+:param port: TCP port
+:param unix_socket: Unix socket path, used instead of TCP if supplied
+:returns: returns the reply of the server as a string, paychecks in Customer's Definition Format followed by the skipped shift records, or an error message
+"""
+async def request_payroll(raw_records, host=PAYROLL_SERVER_HOST, port=PAYROLL_SERVER_PORT, unix_socket=None):
+ import asyncio
+ if unix_socket:
+  reader, writer = await asyncio.open_unix_connection(unix_socket)
+ else:
+  reader, writer = await asyncio.open_connection(host, port)
+ writer.write(''.join(raw_record + "\n" for raw_record in raw_records if raw_record).encode() + b"\n")
+ await writer.drain()
+ reply = await reader.read()
+ writer.close()
+ await writer.wait_closed()
+ return reply.decode()
+
+"""
+Runs the script: parses the CLI invocation arguments, calculates the payroll in the selected mode and writes the paychecks
+The simple one-argument invocation (just a filename) skips argparse, so only the modules it needs are imported
+
+:param argv: list of arguments, sys.argv[1:] if None
+:returns: None
+"""
+def main(argv=None):
+ argv = sys.argv[1:] if argv is None else argv
+ if len(argv) == 1 and not argv[0].startswith('-') and not os.path.isdir(argv[0]) and (os.path.exists(argv[0]) or not any(character in argv[0] for character in '*?[')):
+  # Simple one-argument invocation: no argparse, no optional module is ever imported
+  write_paychecks(get_weekly_payment_for_all_employees(get_data_from_input_file(read_input_file(argv[0]))))
+  return
+ start = time.perf_counter()
+ arguments = parse_cli_invocation(argv)
+ if arguments.profile:
+  enable_profiling()
+  record_profiled_stage('parse_cli_invocation', start, 1)
+ if arguments.rates:
+  set_rate_table(profile_stage('load_rate_table', load_rate_table, arguments.rates))
+ if arguments.serve:
+  run_payroll_server(arguments.host, arguments.port, arguments.unix_socket)
+  return
+ if arguments.client:
+  import asyncio
+  for line in asyncio.run(request_payroll(read_input_file_lazily(arguments.filename), arguments.host, arguments.port, arguments.unix_socket)).splitlines(keepends=True):
+   (sys.stderr if line.startswith("Skipping record:") else sys.stdout).write(line)
+  return
+ input_file_size = sum(os.path.getsize(filename) for filename in arguments.filenames if os.path.exists(filename)) if arguments.profile else 0
+ output_file = open(arguments.output, 'w', buffering=1<<20) if arguments.output else sys.stdout
+ if arguments.stream:
+  paychecks = stream_weekly_payment_for_all_employees(read_input_file_lazily(arguments.filename))
+  start = time.perf_counter()
+  streamed_records = write_paychecks(paychecks, output_file, arguments.format)
+  record_profiled_stage('stream_weekly_payment_for_all_employees', start, streamed_records, input_file_size)
+ elif len(arguments.filenames) > 1:
+  payrolls = profile_stage('get_weekly_payment_for_input_files', get_weekly_payment_for_input_files, arguments.filenames, arguments.workers or os.cpu_count() or 1, processed_bytes=input_file_size)
+  if arguments.consolidate:
+   profile_stage('write_paychecks', write_paychecks, consolidate_payrolls(payrolls), output_file, arguments.format)
+  else:
+   profile_stage('write_paychecks_of_files', write_paychecks_of_files, payrolls, output_file, arguments.format)
+ else:
+  if arguments.incremental and not arguments.no_cache:
+   paychecks = profile_stage('get_weekly_payment_for_all_employees_incremental', get_weekly_payment_for_all_employees_incremental, read_input_file_lazily(arguments.filename), arguments.cache_file, arguments.cache_size, processed_bytes=input_file_size)
+  elif arguments.validate or arguments.merge_overlaps or (arguments.exact and not arguments.vectorized):
+   if arguments.validate:
+    shift_tables, invalid_records = profile_stage('get_shift_tables_from_input_file_validated', get_shift_tables_from_input_file_validated, arguments.filename, arguments.workers, arguments.error_report, arguments.error_budget, processed_bytes=input_file_size)
+    if invalid_records:
+     print("Skipped", invalid_records, "invalid records, see", arguments.error_report, file=sys.stderr)
+   else:
+    shift_tables = profile_stage('get_shift_tables_from_input_file', get_shift_tables_from_input_file, read_input_file_lazily(arguments.filename), processed_bytes=input_file_size)
+   if arguments.merge_overlaps:
+    paychecks, merged_minutes = profile_stage('get_weekly_payment_for_all_shift_tables_merged', get_weekly_payment_for_all_shift_tables_merged, shift_tables, arguments.exact)
+    for employee in merged_minutes:
+     if merged_minutes[employee]:
+      print("Merged away", merged_minutes[employee], "overlapping minutes of", employee, file=sys.stderr)
+   else:
+    paychecks = profile_stage('get_weekly_payment_for_all_shift_tables', get_weekly_payment_for_all_shift_tables, shift_tables, arguments.exact)
+  elif arguments.workers > 0:
+   paychecks = profile_stage('get_weekly_payment_for_all_employees_in_parallel', get_weekly_payment_for_all_employees_in_parallel, arguments.filename, arguments.workers, processed_bytes=input_file_size)
+  elif arguments.mmap:
+   paychecks = profile_stage('get_weekly_payment_for_input_file_mmap', get_weekly_payment_for_input_file_mmap, arguments.filename, processed_bytes=input_file_size)
+  elif arguments.vectorized:
+   shift_columns = profile_stage('get_shift_columns_from_input_file', get_shift_columns_from_input_file, arguments.filename, processed_bytes=input_file_size)
+   paychecks = profile_stage('get_weekly_payment_for_all_employees_vectorized', get_weekly_payment_for_all_employees_vectorized, shift_columns, arguments.exact)
+  else:
+   shift_price_cache = ShiftPriceCache(arguments.shift_cache_size) if arguments.shift_cache_size > 0 else None
+   raw_records = profile_stage('read_input_file', read_input_file, arguments.filename, processed_bytes=input_file_size)
+   employee_records = profile_stage('get_data_from_input_file', get_data_from_input_file, raw_records)
+   paychecks = profile_stage('get_weekly_payment_for_all_employees', get_weekly_payment_for_all_employees, employee_records, shift_price_cache)
+   if shift_price_cache is not None:
+    print("Shift price cache:", shift_price_cache.get_statistics(), file=sys.stderr)
+  profile_stage('write_paychecks', write_paychecks, paychecks, output_file, arguments.format, in_cents=arguments.exact)
+ if output_file is not sys.stdout:
+  output_file.close()
+ if arguments.profile:
+  print(get_profile_summary(), file=sys.stderr)
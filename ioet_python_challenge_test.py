@@ -1,6 +1,31 @@
 #!/usr/bin/env python
+import io
+import sys
+import csv
+import contextlib
+import os
+import subprocess
+import asyncio
+import json
+import random
+import tempfile
 import unittest
+import importlib.util
+from decimal import Decimal, ROUND_HALF_UP
+from concurrent.futures import ThreadPoolExecutor
 import ioet_python_challenge as ioet
+import ioet_python_challenge_benchmark as benchmark
+
+def generate_raw_records(employees, shifts_per_employee, seed):
+ generator = random.Random(seed)
+ raw_records = []
+ for employee in range(employees):
+  hourly_records = []
+  for shift in range(shifts_per_employee):
+   start_time, end_time = sorted(generator.sample(range(1,1441), 2))
+   hourly_records.append("%s%02d:%02d-%02d:%02d" % (generator.choice(ioet.DAYS_OF_WEEK), start_time//60, start_time%60, (end_time//60)%24, end_time%60))
+  raw_records.append("EMPLOYEE" + "".join(chr(65+int(digit)) for digit in str(generator.randrange(employees))) + "=" + ",".join(hourly_records))
+ return raw_records
 
 class TestIOETScript(unittest.TestCase):
  
@@ -139,5 +164,635 @@ class TestIOETScript(unittest.TestCase):
   expected = (21,35)
   self.assertEqual(expected, actual)
 
+ def test_missing_input_file_read_lazily(self):
+  self.assertRaises(SystemExit, list, ioet.read_input_file_lazily('file_no_exists.txt'))
+
+ def test_read_input_file_lazily_matches_read_input_file(self):
+  actual = list(ioet.read_input_file_lazily('ioet_challenge_test_input_data.txt'))
+  expected = ioet.read_input_file('ioet_challenge_test_input_data.txt')
+  self.assertEqual(expected, actual)
+
+ def test_no_data_in_streamed_input(self):
+  self.assertRaises(SystemExit, list, ioet.stream_weekly_payment_for_all_employees([]))
+
+ def test_streamed_payroll_matches_whole_file_payroll(self):
+  raw_records = ioet.read_input_file('ioet_challenge_test_input_data.txt')
+  actual = [(employee, round(amount,2)) for employee, amount in ioet.stream_weekly_payment_for_all_employees(iter(raw_records))]
+  paychecks = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records))
+  expected = [(employee, round(paychecks[employee],2)) for employee in paychecks]
+  self.assertEqual(expected, actual)
+
+ def test_streamed_payroll_reports_repeated_employees(self):
+  raw_records = ['RENE=MO10:00-12:00', 'ASTRID=MO10:00-12:00', 'RENE=MO10:00-11:00']
+  stderr = io.StringIO()
+  with contextlib.redirect_stderr(stderr):
+   actual = [(employee, round(amount,2)) for employee, amount in ioet.stream_weekly_payment_for_all_employees(iter(raw_records))]
+  self.assertEqual([('RENE', 30.0), ('ASTRID', 30.0), ('RENE', 15.0)], actual)
+  self.assertEqual("Re-emitted the paycheck of RENE superseding the previous one\n", stderr.getvalue())
+
+ def test_parse_raw_record_case_RENE(self):
+  actual = ioet.parse_raw_record('RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-00:00')
+  expected = ('RENE', [(1,600,720), (2,600,720), (4,60,180), (6,840,1080), (7,1200,1440)])
+  self.assertEqual(expected, actual)
+
+ def test_parse_raw_record_no_good_format(self):
+  for raw_record in ['RENE=', 'RENE=MO', '=MO10:00-21:00', 'RENE=MO10:00-21:00KIM=MO10:00-21:00,', 'RENE=MO10:00-12:00,']:
+   self.assertRaises(Exception, ioet.parse_raw_record, raw_record)
+
+ def test_parse_raw_record_skips_out_of_bounds_and_incoherent_records(self):
+  actual = ioet.parse_raw_record('RENE=MO27:30-28:00,TU07:69-08:00,WE12:00-10:00,FR10:00-12:00')
+  expected = ('RENE', [(5,600,720)])
+  self.assertEqual(expected, actual)
+
+ def test_parse_raw_record_matches_current_functions(self):
+  for raw_record in ioet.read_input_file('ioet_challenge_test_input_data.txt'):
+   expected = [(ioet.get_number_of_day(day), ioet.time_to_planar_time(start_time), ioet.time_to_planar_time(end_time)) for day, start_time, end_time in map(ioet.get_day_and_time_from_hourly_record, ioet.get_each_employee_record(raw_record).split(","))]
+   self.assertEqual((ioet.get_employee_name(raw_record), expected), ioet.parse_raw_record(raw_record))
+
+ def test_shift_price_cache_counts_hits_misses_and_evictions(self):
+  shift_price_cache = ioet.ShiftPriceCache(2)
+  self.assertEqual(30, shift_price_cache.get_price('MO10:00-12:00'))
+  self.assertEqual(30, shift_price_cache.get_price('MO10:00-12:00'))
+  shift_price_cache.get_price('TU10:00-12:00')
+  shift_price_cache.get_price('WE10:00-12:00')
+  self.assertIsNone(shift_price_cache.lookup('MO10:00-12:00'))
+  self.assertEqual({'hits': 1, 'misses': 4, 'evictions': 1, 'entries': 2}, shift_price_cache.get_statistics())
+
+ def test_shift_price_cache_does_not_store_skipped_records(self):
+  shift_price_cache = ioet.ShiftPriceCache()
+  actual = ioet.get_weekly_payment_for_specific_employee(['MO27:30-28:00', 'MO10:00-12:00', 'MO27:30-28:00'], shift_price_cache)
+  self.assertEqual(30, actual)
+  self.assertEqual({'hits': 0, 'misses': 3, 'evictions': 0, 'entries': 1}, shift_price_cache.get_statistics())
+  self.assertIsNone(shift_price_cache.get_price('MO27:30-28:00'))
+  self.assertRaises(Exception, shift_price_cache.get_price, 'MO10:00')
+
+ def test_shift_cache_size_is_not_silently_ignored(self):
+  for flags in [['--stream'], ['--incremental'], ['--vectorized'], ['--mmap'], ['--workers', '2'], ['--serve'], ['--client']]:
+   with contextlib.redirect_stderr(io.StringIO()):
+    self.assertRaises(SystemExit, ioet.parse_cli_invocation, ['--shift-cache-size', '10'] + flags + ['ioet_challenge_test_input_data.txt'])
+  self.assertEqual(10, ioet.parse_cli_invocation(['--shift-cache-size', '10', 'ioet_challenge_test_input_data.txt']).shift_cache_size)
+
+ def test_cached_payroll_shared_among_threads_matches_reference_payroll(self):
+  employee_records = ioet.get_data_from_input_file(generate_raw_records(200, 8, 5) + ioet.read_input_file('ioet_challenge_test_input_data.txt'))
+  expected = ioet.get_weekly_payment_for_all_employees(employee_records)
+  shift_price_cache = ioet.ShiftPriceCache(100)
+  with ThreadPoolExecutor(max_workers=4) as executor:
+   actual = dict(zip(employee_records, executor.map(lambda employee: ioet.get_weekly_payment_for_specific_employee(employee_records[employee], shift_price_cache), employee_records)))
+  for employee in expected:
+   self.assertAlmostEqual(expected[employee], actual[employee])
+  statistics = shift_price_cache.get_statistics()
+  self.assertEqual(sum(len(records) for records in employee_records.values()), statistics['hits'] + statistics['misses'])
+  self.assertGreater(statistics['hits'], 0)
+
+ def test_wage_table_size(self):
+  self.assertEqual([1441]*7, [len(cumulative_wage) for cumulative_wage in ioet.get_wage_table()])
+
+ def test_compiled_regex_is_reused(self):
+  self.assertIs(ioet.compile_regex(ioet.HOURLY_RECORD_REGEX), ioet.compile_regex(ioet.HOURLY_RECORD_REGEX))
+
+ def test_shift_amount_matches_recursive_amount(self):
+  for day in range(1,8):
+   for start_time in range(0,1441,37):
+    for end_time in range(start_time,1441,29):
+     self.assertAlmostEqual(ioet.calculate_hourly_amount(day,start_time,end_time), ioet.calculate_shift_amount(day,start_time,end_time))
+
+ def test_shift_amount_on_time_shift_boundaries(self):
+  for start_time, end_time in [(540,541), (540,1081), (0,540), (541,1080), (1080,1440), (1440,1440)]:
+   self.assertAlmostEqual(ioet.calculate_hourly_amount(6,start_time,end_time), ioet.calculate_shift_amount(6,start_time,end_time))
+
+ def test_good_normal_specific_employee_paycheck_from_shifts_case_RENE(self):
+  actual = round(ioet.get_weekly_payment_from_shifts(ioet.parse_raw_record('RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00')[1]),2)
+  expected = 215
+  self.assertEqual(expected, actual)
+
+ def test_rate_file_compiles_into_default_rate_table(self):
+  with tempfile.TemporaryDirectory() as directory:
+   rate_table = ioet.load_rate_table('ioet_challenge_rates.json', directory)
+   cached_rate_table = ioet.load_rate_table('ioet_challenge_rates.json', directory)
+   self.assertEqual(1, len(os.listdir(directory)))
+  self.assertEqual(rate_table, cached_rate_table)
+  self.assertEqual(ioet.build_wage_table(rate_table), cached_rate_table.wage_table)
+  self.assertEqual([[0, 540, 1080]] * 7, rate_table.band_starts)
+  self.assertEqual(ioet.get_default_rate_table().band_rates, rate_table.band_rates)
+  self.assertEqual(ioet.get_default_rate_table().surcharges, rate_table.surcharges)
+  self.assertAlmostEqual(225 + 135 + 120, rate_table.wage_table[0][1440])
+  self.assertAlmostEqual(225 + 134.75 + 119 + 2/3, ioet.get_wage_table()[0][1440])
+
+ def test_out_of_day_times_are_skipped_by_every_path(self):
+  raw_records = ['RENE=TH18:00-24:30,MO10:00-12:00', 'KIM=SU23:00-24:59']
+  self.assertRaises(Exception, ioet.get_rate_table().get_band, 1, 1470)
+  self.assertRaises(Exception, ioet.get_rate_table().get_band, 1, -5)
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   with open(filename, 'w') as input_file:
+    input_file.write("\n".join(raw_records))
+   actual = ioet.get_weekly_payment_for_input_file_mmap(filename)
+  expected = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records))
+  self.assertEqual({'RENE': 3000, 'KIM': 0}, {employee: ioet.get_amount_in_cents(expected[employee]) for employee in expected})
+  self.assertEqual({'RENE': 3000, 'KIM': 0}, {employee: ioet.get_amount_in_cents(actual[employee]) for employee in actual})
+
+ def test_rate_table_cache_is_not_trusted(self):
+  with tempfile.TemporaryDirectory() as directory:
+   expected = ioet.load_rate_table('ioet_challenge_rates.json', directory)
+   cache_filename = os.path.join(directory, os.listdir(directory)[0])
+   with open(cache_filename) as cache_file:
+    cached_rate_table = json.load(cache_file)
+   cached_rate_table['band_starts'][0][1] = 541
+   with open(cache_filename, 'w') as cache_file:
+    json.dump(cached_rate_table, cache_file)
+   self.assertEqual(expected, ioet.load_rate_table('ioet_challenge_rates.json', directory))
+   self.assertEqual(expected, ioet.load_rate_table('ioet_challenge_rates.json', os.path.join(cache_filename, 'not_a_directory')))
+
+ def test_rate_table_with_many_bands_per_day(self):
+  rate_config = {'bands': [{'start': start, 'end': start+60, 'rate': start//60} for start in range(0, 1440, 60)], 'days': {'SU': {'bands': [{'start': 0, 'end': 1440, 'rate': 60}], 'surcharge': 30}}}
+  rate_table = ioet.compile_rate_config(rate_config)
+  self.assertEqual(1, rate_table.get_band(1, 60))
+  self.assertEqual(1, rate_table.get_band(1, 119))
+  self.assertEqual(2, rate_table.get_band(1, 120))
+  self.assertEqual(23, rate_table.get_band(1, 1440))
+  self.assertEqual(0, rate_table.get_band(7, 1440))
+  active_rate_table = ioet.get_rate_table()
+  try:
+   ioet.set_rate_table(rate_table)
+   self.assertAlmostEqual(ioet.calculate_hourly_amount(1,60,180), ioet.calculate_shift_amount(1,60,180))
+   self.assertAlmostEqual(1 + 2, ioet.calculate_hourly_amount(1,60,180))
+   self.assertAlmostEqual(1 + 2, ioet.calculate_shift_amount(1,60,180))
+   self.assertAlmostEqual(sum(range(24)), ioet.calculate_hourly_amount(1,0,1440))
+   self.assertAlmostEqual(sum(range(24)), ioet.calculate_shift_amount(1,0,1440))
+   self.assertAlmostEqual(90, ioet.get_hourly_payment('SU','10:00','11:00'))
+  finally:
+   ioet.set_rate_table(active_rate_table)
+
+ def test_rate_table_with_gaps_between_bands(self):
+  for bands in [[{'start': 0, 'end': 540, 'rate': 25}, {'start': 541, 'end': 1440, 'rate': 15}], [{'start': 0, 'end': 540, 'rate': 25}, {'start': 540, 'end': 540, 'rate': 15}, {'start': 540, 'end': 1440, 'rate': 15}], [{'start': 0, 'end': 1080, 'rate': 25}], [{'start': 1, 'end': 1440, 'rate': 25}], []]:
+   self.assertRaises(Exception, ioet.compile_rate_config, {'bands': bands})
+  self.assertRaises(Exception, ioet.compile_rate_config, {'bands': [{'start': 0, 'end': 1440, 'rate': 25}], 'days': {'XX': {'surcharge': 5}}})
+
+ def test_rate_file_numbers_are_not_truncated(self):
+  self.assertEqual([0, 540], ioet.compile_rate_config({'bands': [{'start': 0, 'end': 540, 'rate': 25}, {'start': 540.0, 'end': 1440, 'rate': 15.5}]}).band_starts[0])
+  for band in [{'start': 540.5, 'end': 1440, 'rate': 15}, {'start': '540', 'end': 1440, 'rate': 15}, {'end': 1440, 'rate': 15}, {'start': 540, 'end': 1440, 'rate': '15'}, {'start': 540, 'end': 1440, 'rate': float('nan')}]:
+   with self.assertRaises(Exception) as error:
+    ioet.compile_rate_config({'bands': [{'start': 0, 'end': 540, 'rate': 25}, band]})
+   self.assertIn('is not a valid MO', str(error.exception))
+  self.assertRaises(Exception, ioet.compile_rate_config, {'bands': [{'start': 0, 'end': 1440, 'rate': 25}], 'surcharge': None})
+
+ def test_time_shift_helpers_keep_customer_interval_names(self):
+  self.assertEqual(['Early Morning Shift', 'Normal Shift', 'Night Shift'], [ioet.get_time_shift(time) for time in (0, 600, 1440)])
+  self.assertEqual(1080, ioet.get_ceil_time_shift('Normal Shift'))
+  self.assertEqual((1, 1080, 1081), (ioet.get_time_shift_band(600), ioet.get_time_shift_band_ceiling(1), ioet.get_next_time_shift_band_start(1)))
+
+ @unittest.skipUnless(importlib.util.find_spec('numpy'), "NumPy is not installed")
+ def test_vectorized_payroll_matches_reference_payroll(self):
+  for raw_records in [ioet.read_input_file('ioet_challenge_test_input_data.txt'), generate_raw_records(300, 12, 4)]:
+   expected = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records))
+   actual = ioet.get_weekly_payment_for_all_employees_vectorized(ioet.get_shift_columns_from_raw_bytes("".join(raw_record + "\n" for raw_record in raw_records).encode()))
+   self.assertEqual(list(expected), list(actual))
+   for employee in expected:
+    self.assertAlmostEqual(expected[employee], actual[employee])
+
+ @unittest.skipUnless(importlib.util.find_spec('numpy'), "NumPy is not installed")
+ def test_vectorized_columns_follow_record_parser_rules(self):
+  content = "RENE=MO10:00-12:00,TU27:00-28:00 \r\nASTRID=SA14:00-18:00\r\nRENE=SU20:00-21:00,MO12:00-10:00\nKIM=MO00:00-00:00,TH00:00-24:00"
+  stderr = io.StringIO()
+  with contextlib.redirect_stderr(stderr):
+   employees, employee_ids, days, start_times, end_times = ioet.get_shift_columns_from_raw_bytes(content.encode())
+  self.assertEqual(['RENE', 'ASTRID', 'KIM'], employees)
+  self.assertEqual([(1, 6, 840, 1080), (0, 7, 1200, 1260), (2, 1, 1440, 1440), (2, 4, 1440, 1440)], list(zip(employee_ids.tolist(), days.tolist(), start_times.tolist(), end_times.tolist())))
+  self.assertEqual(["TU27:00-28:00", "MO12:00-10:00"], [line.split()[2] for line in stderr.getvalue().splitlines()])
+  for invalid_line in ["", "RENE=MO10:00-12:00,", "RENE=MO10:00-12:00TU10:00-12:00", "RENE1=MO10:00-12:00", "R=MO10:00-12:00", "RENE=XX10:00-12:00", "RENE=MO10:0a-12:00", "RENE:MO10:00-12:00"]:
+   with self.assertRaises(Exception) as expected, contextlib.redirect_stderr(io.StringIO()):
+    ioet.parse_raw_record(invalid_line)
+   with self.assertRaises(Exception) as actual, contextlib.redirect_stderr(io.StringIO()):
+    ioet.get_shift_columns_from_raw_bytes(("ASTRID=SA14:00-18:00\n" + invalid_line + "\nKIM=MO10:00-12:00\n").encode())
+   self.assertEqual(str(expected.exception), str(actual.exception))
+
+ def test_exact_wage_table_matches_wage_table(self):
+  self.assertEqual([2500, 1500, 2000, 500], [ioet.get_exact_rate(rate) for rate in (25/60, 15/60, 20/60, 5/60)])
+  self.assertRaises(Exception, ioet.get_exact_rate, 17.333/60)
+  exact_wage_table = ioet.build_exact_wage_table()
+  self.assertEqual([[round(amount * 100 * ioet.EXACT_UNITS_PER_CENT) for amount in cumulative_wage] for cumulative_wage in ioet.get_wage_table()], exact_wage_table)
+  self.assertTrue(all(isinstance(amount, int) for cumulative_wage in exact_wage_table for amount in cumulative_wage))
+
+ def test_exact_payroll_case_input_data(self):
+  shift_tables = ioet.get_shift_tables_from_input_file(ioet.read_input_file('ioet_challenge_test_input_data.txt'))
+  actual = ioet.get_weekly_payment_for_all_shift_tables(shift_tables, exact=True)
+  self.assertEqual({'RENE': 21500, 'ASTRID': 8500, 'MIKE': 81842, 'LAURA': 37725, 'KIM': 43000}, actual)
+  self.assertTrue(all(isinstance(cents, int) for cents in actual.values()))
+  self.assertEqual(2, ioet.get_cents_from_exact_amount(90))
+  self.assertEqual(1, ioet.get_cents_from_exact_amount(89))
+  self.assertEqual(12345678901234567890, ioet.get_cents_from_exact_amount(12345678901234567890 * ioet.EXACT_UNITS_PER_CENT))
+  self.assertEqual('The amount to pay MIKE is: 818.42 USD\nThe amount to pay BIG is: 123456789012345678.90 USD\n', ioet.format_paychecks([('MIKE', 81842), ('BIG', 12345678901234567890)], 'text', in_cents=True))
+
+ def test_exact_payroll_matches_float_payroll_on_synthetic_data(self):
+  shift_tables = ioet.get_shift_tables_from_input_file(generate_raw_records(5000, 20, 11))
+  for employee in shift_tables:
+   exact_amount = ioet.get_exact_weekly_payment_from_shifts(shift_tables[employee])
+   float_amount = ioet.get_weekly_payment_from_shifts(shift_tables[employee])
+   self.assertEqual(round(float_amount * 100 * ioet.EXACT_UNITS_PER_CENT), exact_amount)
+   self.assertLessEqual(abs(ioet.get_amount_in_cents(float_amount) - ioet.get_cents_from_exact_amount(exact_amount)), 1)
+
+ @unittest.skipUnless(importlib.util.find_spec('numpy'), "NumPy is not installed")
+ def test_exact_vectorized_payroll_matches_exact_payroll(self):
+  shift_tables = ioet.get_shift_tables_from_input_file(generate_raw_records(2000, 12, 5))
+  expected = ioet.get_weekly_payment_for_all_shift_tables(shift_tables, exact=True)
+  actual = ioet.get_weekly_payment_for_all_employees_vectorized(ioet.get_shift_columns_from_shift_tables(shift_tables), exact=True)
+  self.assertEqual(list(expected.items()), list(actual.items()))
+
+ @unittest.skipUnless(importlib.util.find_spec('numpy'), "NumPy is not installed")
+ def test_no_data_in_vectorized_input(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   open(filename, 'w').close()
+   self.assertRaises(SystemExit, ioet.get_shift_columns_from_input_file, filename)
+
+ def test_shift_table_holds_parsed_records(self):
+  shift_table = ioet.ShiftTable([(1,600,720), (7,1200,1440)])
+  shift_table.append(4,60,180)
+  self.assertEqual(3, len(shift_table))
+  self.assertEqual([(1,600,720), (7,1200,1440), (4,60,180)], list(shift_table))
+  self.assertRaises(AttributeError, setattr, shift_table, 'employee', 'RENE')
+
+ def test_good_raw_records_into_shift_tables(self):
+  actual = ioet.get_shift_tables_from_input_file(['RENE=MO10:00-12:00,WE10:00-12:00','KIM=FR10:00-12:00','RENE=TU10:00-12:00'])
+  expected = {'RENE': ioet.ShiftTable([(2,600,720)]), 'KIM': ioet.ShiftTable([(5,600,720)])}
+  self.assertEqual(list(expected), list(actual))
+  self.assertEqual(expected, actual)
+
+ def test_no_data_in_shift_tables_input(self):
+  self.assertRaises(SystemExit, ioet.get_shift_tables_from_input_file, [])
+
+ def test_shift_tables_payroll_matches_reference_payroll(self):
+  raw_records = generate_raw_records(100, 6, 11)
+  expected = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records))
+  shift_tables = ioet.get_shift_tables_from_input_file(raw_records)
+  for actual in [ioet.get_weekly_payment_for_all_shift_tables(shift_tables)] + ([ioet.get_weekly_payment_for_all_employees_vectorized(ioet.get_shift_columns_from_shift_tables(shift_tables))] if importlib.util.find_spec('numpy') else []):
+   self.assertEqual(list(expected), list(actual))
+   for employee in expected:
+    self.assertAlmostEqual(expected[employee], actual[employee])
+
+ def test_merge_overlapping_shifts(self):
+  actual = ioet.merge_overlapping_shifts([(1,960,1320), (3,600,720), (1,720,1200), (1,1320,1380), (1,100,200), (3,600,720)])
+  expected = (ioet.ShiftTable([(1,100,200), (1,720,1380), (3,600,720)]), 240+120)
+  self.assertEqual(expected, actual)
+
+ def test_merged_payroll_pays_repeated_shifts_once_case_KIM(self):
+  shift_tables = ioet.get_shift_tables_from_input_file(ioet.read_input_file('ioet_challenge_test_input_data.txt'))
+  paychecks, merged_minutes = ioet.get_weekly_payment_for_all_shift_tables_merged(shift_tables)
+  self.assertEqual(215, round(paychecks['KIM'],2))
+  self.assertEqual(660, merged_minutes['KIM'])
+  self.assertEqual(0, merged_minutes['RENE'])
+  self.assertEqual(215, round(paychecks['RENE'],2))
+
+ def test_pricing_paths_are_not_silently_ignored(self):
+  for flags in [['--workers', '2', '--stream'], ['--workers', '2', '--incremental'], ['--workers', '2', '--vectorized'], ['--mmap', '--vectorized'], ['--mmap', '--stream'], ['--stream', '--incremental'], ['--incremental', '--vectorized']]:
+   with contextlib.redirect_stderr(io.StringIO()):
+    self.assertRaises(SystemExit, ioet.parse_cli_invocation, flags + ['ioet_challenge_test_input_data.txt'])
+  self.assertEqual(2, ioet.parse_cli_invocation(['--workers', '2', '--mmap', 'ioet_challenge_test_input_data.txt']).workers)
+  self.assertTrue(ioet.parse_cli_invocation(['--vectorized', '--exact', 'ioet_challenge_test_input_data.txt']).vectorized)
+
+ def test_merge_overlaps_is_not_silently_ignored(self):
+  for flags in [['--stream'], ['--incremental'], ['--vectorized'], ['--workers', '2'], ['--mmap'], ['--shift-cache-size', '10']]:
+   with contextlib.redirect_stderr(io.StringIO()):
+    self.assertRaises(SystemExit, ioet.parse_cli_invocation, ['--merge-overlaps'] + flags + ['ioet_challenge_test_input_data.txt'])
+  self.assertTrue(ioet.parse_cli_invocation(['--merge-overlaps', '--validate', '--workers', '2', 'ioet_challenge_test_input_data.txt']).merge_overlaps)
+
+ def test_merging_touching_shifts_keeps_amount(self):
+  shifts = [(6,300,540), (6,540,600), (6,600,1440)]
+  merged_shifts, merged_minutes = ioet.merge_overlapping_shifts(shifts)
+  self.assertEqual([(6,300,1440)], list(merged_shifts))
+  self.assertEqual(0, merged_minutes)
+  self.assertAlmostEqual(ioet.get_weekly_payment_from_shifts(shifts), ioet.get_weekly_payment_from_shifts(merged_shifts))
+
+ def test_missing_input_file_read_mmap(self):
+  self.assertRaises(SystemExit, list, ioet.read_input_file_mmap('file_no_exists.txt'))
+
+ def test_read_input_file_mmap_matches_read_input_file(self):
+  actual = [bytes(line).decode() for offset, line in ioet.read_input_file_mmap('ioet_challenge_test_input_data.txt')]
+  expected = ioet.read_input_file('ioet_challenge_test_input_data.txt')
+  self.assertEqual(expected, actual)
+
+ def test_parse_raw_record_bytes_matches_parse_raw_record(self):
+  for raw_record in ioet.read_input_file('ioet_challenge_test_input_data.txt') + ['RENE=MO27:30-28:00,TU07:69-08:00,WE12:00-10:00,FR10:00-12:00']:
+   self.assertEqual(ioet.parse_raw_record(raw_record), ioet.parse_raw_record_bytes(memoryview(raw_record.encode())))
+
+ def test_parse_raw_record_bytes_no_good_format(self):
+  for raw_record in [b'', b'RENE', b'RENE=', b'RENE=MO', b'=MO10:00-21:00', b'RENE=MO10:00-21:00KIM=MO10:00-21:00,', b'RENE=MO10:00-12:00,', b'RENE=XX10:00-12:00', b'RENE=MO1O:00-12:00']:
+   self.assertRaises(Exception, ioet.parse_raw_record_bytes, raw_record)
+
+ def test_mmap_payroll_matches_reference_payroll(self):
+  actual = ioet.get_weekly_payment_for_input_file_mmap('ioet_challenge_test_input_data.txt')
+  expected = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(ioet.read_input_file('ioet_challenge_test_input_data.txt')))
+  self.assertEqual(list(expected), list(actual))
+  for employee in expected:
+   self.assertAlmostEqual(expected[employee], actual[employee])
+
+ def test_incremental_payroll_reuses_cached_records(self):
+  raw_records = ioet.read_input_file('ioet_challenge_test_input_data.txt')
+  with tempfile.TemporaryDirectory() as directory:
+   cache_filename = os.path.join(directory, 'cache.sqlite3')
+   first_run = ioet.get_weekly_payment_for_all_employees_incremental(raw_records, cache_filename)
+   cache = ioet.open_payroll_cache(cache_filename)
+   with cache:
+    cache.execute("UPDATE payroll_cache SET payment = 1 WHERE employee = 'RENE'")
+   cache.close()
+   second_run = ioet.get_weekly_payment_for_all_employees_incremental(raw_records[:-1] + ['KIM=MO10:00-12:00'], cache_filename)
+  self.assertEqual(['RENE', 'ASTRID', 'MIKE', 'LAURA', 'KIM'], list(first_run))
+  self.assertEqual(215, round(first_run['RENE'],2))
+  self.assertEqual(1, second_run['RENE'])
+  self.assertEqual(30, round(second_run['KIM'],2))
+
+ def test_incremental_payroll_is_repriced_when_wages_change(self):
+  extra_weekend_wage, rate_table = ioet.EXTRA_WEEKEND_WAGE_PER_MINUTE, ioet.get_rate_table()
+  with tempfile.TemporaryDirectory() as directory:
+   cache_filename = os.path.join(directory, 'cache.sqlite3')
+   first_run = ioet.get_weekly_payment_for_all_employees_incremental(['RENE=SA10:00-12:00'], cache_filename)
+   try:
+    ioet.EXTRA_WEEKEND_WAGE_PER_MINUTE = 0
+    ioet.set_rate_table(ioet.get_default_rate_table())
+    second_run = ioet.get_weekly_payment_for_all_employees_incremental(['RENE=SA10:00-12:00'], cache_filename)
+   finally:
+    ioet.EXTRA_WEEKEND_WAGE_PER_MINUTE = extra_weekend_wage
+    ioet.set_rate_table(rate_table)
+  self.assertEqual(40, round(first_run['RENE'],2))
+  self.assertEqual(30, round(second_run['RENE'],2))
+
+ def test_incremental_payroll_cache_is_size_bounded(self):
+  with tempfile.TemporaryDirectory() as directory:
+   cache_filename = os.path.join(directory, 'cache.sqlite3')
+   ioet.get_weekly_payment_for_all_employees_incremental(ioet.read_input_file('ioet_challenge_test_input_data.txt'), cache_filename, 2)
+   cache = ioet.open_payroll_cache(cache_filename)
+   self.assertEqual(2, cache.execute('SELECT COUNT(*) FROM payroll_cache').fetchone()[0])
+   cache.close()
+
+ def test_input_file_chunks_are_aligned_to_lines(self):
+  with open('ioet_challenge_test_input_data.txt', 'rb') as input_file:
+   content = input_file.read()
+  chunks = ioet.split_input_file_in_chunks('ioet_challenge_test_input_data.txt', 4)
+  self.assertEqual(content, b''.join(content[start:end] for start, end in chunks))
+  self.assertEqual(content.splitlines(), [line for start, end in chunks for line in content[start:end].splitlines()])
+
+ def test_parallel_payroll_matches_reference_payroll(self):
+  raw_records = generate_raw_records(200, 5, 7)
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   with open(filename, 'w') as input_file:
+    input_file.write("\n".join(raw_records))
+   actual = ioet.get_weekly_payment_for_all_employees_in_parallel(filename, 3)
+  expected = ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records))
+  self.assertEqual(list(expected), list(actual))
+  for employee in expected:
+   self.assertAlmostEqual(expected[employee], actual[employee])
+
+ def test_input_filenames_expand_directories_and_globs(self):
+  with tempfile.TemporaryDirectory() as directory:
+   for name in ['b.txt', 'a.txt', 'c.csv', 'site[1].txt']:
+    open(os.path.join(directory, name), 'w').close()
+   os.mkdir(os.path.join(directory, 'sub'))
+   self.assertEqual([os.path.join(directory, name) for name in ['a.txt', 'b.txt', 'c.csv', 'site[1].txt']], ioet.expand_input_filenames([directory]))
+   self.assertEqual([os.path.join(directory, 'site[1].txt')], ioet.expand_input_filenames([os.path.join(directory, 'site[1].txt')]))
+   self.assertEqual([os.path.join(directory, name) for name in ['a.txt', 'b.txt', 'site[1].txt', 'missing.txt']], ioet.expand_input_filenames([os.path.join(directory, '*.txt'), os.path.join(directory, 'a.txt'), os.path.join(directory, 'missing.txt')]))
+
+ def test_input_files_payroll_per_file_and_consolidated(self):
+  raw_records = [generate_raw_records(100, 4, seed) for seed in range(3)]
+  with tempfile.TemporaryDirectory() as directory:
+   filenames = []
+   for seed, records in enumerate(raw_records):
+    filenames.append(os.path.join(directory, 'site' + str(seed) + '.txt'))
+    with open(filenames[-1], 'w') as input_file:
+     input_file.write("\n".join(records))
+   payrolls = ioet.get_weekly_payment_for_input_files(filenames, 2)
+  expected = [ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(records)) for records in raw_records]
+  self.assertEqual(filenames, list(payrolls))
+  for filename, expected_payroll in zip(filenames, expected):
+   self.assertEqual(list(expected_payroll), list(payrolls[filename]))
+   for employee in expected_payroll:
+    self.assertAlmostEqual(expected_payroll[employee], payrolls[filename][employee])
+  consolidated_payroll = ioet.consolidate_payrolls(payrolls)
+  for employee in consolidated_payroll:
+   self.assertAlmostEqual(sum(payroll.get(employee, 0) for payroll in expected), consolidated_payroll[employee])
+
+ def test_missing_input_file_among_several(self):
+  self.assertRaises(SystemExit, ioet.get_weekly_payment_for_input_files, ['ioet_challenge_test_input_data.txt', 'file_no_exists.txt'], 1)
+
+ def test_empty_input_file_among_several(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'empty.txt')
+   open(filename, 'w').close()
+   with self.assertRaises(SystemExit) as raised:
+    ioet.get_weekly_payment_for_input_files(['ioet_challenge_test_input_data.txt', filename], 1)
+  self.assertIn(filename + ': No records at all', str(raised.exception.code))
+
+ def test_validation_reports_every_invalid_record(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   error_report = os.path.join(directory, 'errors.jsonl')
+   with open(filename, 'w') as input_file:
+    input_file.write("RENE=MO10:00-12:00,TU27:00-28:00\nBAD LINE\nASTRID=SA10:00-12:00,MO12:00-10:00\nRENE=MO10:00-13:00\n")
+   shift_tables, invalid_records = ioet.get_shift_tables_from_input_file_validated(filename, error_report=error_report)
+   with open(error_report) as report:
+    errors = [json.loads(line) for line in report]
+  self.assertEqual(3, invalid_records)
+  self.assertEqual({'RENE': [(1,600,780)], 'ASTRID': [(6,600,720)]}, {employee: list(shift_tables[employee]) for employee in shift_tables})
+  self.assertEqual([(1, 19, 'TU27:00-28:00'), (2, 33, 'BAD LINE'), (3, 63, 'MO12:00-10:00')], [(error['line'], error['offset'], error['record']) for error in errors])
+
+ def test_parallel_validation_matches_single_process_validation(self):
+  raw_records = generate_raw_records(200, 5, 7)
+  raw_records[10] = raw_records[10].replace('=', '')
+  raw_records[150] += ',MO25:00-26:00'
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   with open(filename, 'w') as input_file:
+    input_file.write("\n".join(raw_records))
+   expected = ioet.get_shift_tables_from_input_file_validated(filename, error_report=os.path.join(directory, 'expected.jsonl'))
+   actual = ioet.get_shift_tables_from_input_file_validated(filename, 3, os.path.join(directory, 'actual.jsonl'))
+   with open(os.path.join(directory, 'expected.jsonl')) as expected_report, open(os.path.join(directory, 'actual.jsonl')) as actual_report:
+    self.assertEqual(expected_report.read(), actual_report.read())
+  self.assertEqual(expected, actual)
+  self.assertEqual(2, actual[1])
+
+ def test_validate_is_not_silently_ignored(self):
+  for flags in [['--validate', '--stream'], ['--validate', '--incremental'], ['--validate', '--vectorized'], ['--validate', '--shift-cache-size', '10'], ['--error-budget', '5'], ['--error-report', 'errors.jsonl']]:
+   with contextlib.redirect_stderr(io.StringIO()):
+    self.assertRaises(SystemExit, ioet.parse_cli_invocation, flags + ['ioet_challenge_test_input_data.txt'])
+  self.assertEqual(ioet.PAYROLL_ERROR_REPORT_FILENAME, ioet.parse_cli_invocation(['--validate', 'ioet_challenge_test_input_data.txt']).error_report)
+  arguments = ioet.parse_cli_invocation(['--validate', '--error-report', 'errors.jsonl', '--error-budget', '5', 'ioet_challenge_test_input_data.txt'])
+  self.assertEqual(('errors.jsonl', 5), (arguments.error_report, arguments.error_budget))
+
+ def test_validation_aborts_beyond_error_budget(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   with open(filename, 'w') as input_file:
+    input_file.write("RENE=MO10:00-12:00\nBAD LINE\nWORSE LINE\n")
+   self.assertEqual(2, ioet.get_shift_tables_from_input_file_validated(filename, error_report=os.path.join(directory, 'errors.jsonl'), error_budget=2)[1])
+   self.assertRaises(SystemExit, ioet.get_shift_tables_from_input_file_validated, filename, 0, os.path.join(directory, 'errors.jsonl'), 1)
+   with open(filename, 'w') as input_file:
+    input_file.write("BAD LINE\n" + "\n".join(generate_raw_records(1000, 3, 2)))
+   shift_tables, lines, invalid_records = ioet.validate_input_file_chunk((filename, 0, None), 0)
+   self.assertEqual((1, 1), (lines, len(invalid_records)))
+   self.assertRaises(SystemExit, ioet.get_shift_tables_from_input_file_validated, filename, 0, os.path.join(directory, 'errors.jsonl'), 0)
+
+ def test_profiling_counts_hot_calls_and_stages(self):
+  ioet.enable_profiling()
+  try:
+   employee_records = ioet.profile_stage('get_data_from_input_file', ioet.get_data_from_input_file, ['RENE=SU00:00-10:00,SU01:00-10:00'])
+   ioet.profile_stage('get_weekly_payment_for_all_employees', ioet.get_weekly_payment_for_all_employees, employee_records)
+   profile = json.loads(ioet.get_profile_summary())
+  finally:
+   ioet.disable_profiling()
+  self.assertEqual({'calls': 1, 'records': 1, 'bytes': 0}, {key: value for key, value in profile['stages']['get_data_from_input_file'].items() if key != 'seconds'})
+  self.assertEqual(['get_data_from_input_file', 'get_weekly_payment_for_all_employees'], list(profile['stages']))
+  self.assertEqual(1, profile['counters']['skipped_records'])
+  self.assertEqual(2, profile['counters']['calculate_hourly_amount_calls'])
+  self.assertEqual(2, profile['counters']['calculate_hourly_amount_max_depth'])
+  self.assertGreater(profile['counters']['regex_evaluations'], 0)
+
+ def test_profiling_disabled_records_nothing(self):
+  self.assertIsNone(ioet.PROFILE)
+  self.assertEqual(30, ioet.profile_stage('get_hourly_payment', ioet.get_hourly_payment, 'MO', '10:00', '12:00'))
+  self.assertIsNone(ioet.PROFILE)
+
+ def test_amount_in_exact_cents(self):
+  self.assertEqual([21500, 81842, 268, 0, -5], [ioet.get_amount_in_cents(amount) for amount in [215, 818.4166666666667, 2.675, 0.004, -0.05]])
+  self.assertEqual(['215.00', '0.07', '-0.05'], [ioet.format_cents(cents) for cents in [21500, 7, -5]])
+
+ def test_amount_in_cents_matches_decimal_rounding(self):
+  generator = random.Random(3)
+  amounts = [1.005, -1.005, 0.125, 1234567.895] + [generator.uniform(-10**6, 10**6) for _ in range(10000)] + [generator.randrange(-10**6, 10**6) / 1000 for _ in range(10000)]
+  for amount in amounts:
+   self.assertEqual(int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)), ioet.get_amount_in_cents(amount))
+
+ def test_amount_in_cents_of_ints_and_decimals(self):
+  self.assertEqual([268, -268, 267, 21500, -3000, 0], [ioet.get_amount_in_cents(amount) for amount in [Decimal('2.675'), Decimal('-2.675'), Decimal('2.6749999'), 215, -30, Decimal(0)]])
+
+ def test_write_paychecks_in_every_format(self):
+  paychecks = {'RENE': 215, 'MIKE': 818.4166666666667}
+  expected = {
+   'text': 'The amount to pay RENE is: 215.00 USD\nThe amount to pay MIKE is: 818.42 USD\n',
+   'csv': 'employee,amount,currency\nRENE,215.00,USD\nMIKE,818.42,USD\n',
+   'jsonl': '{"employee": "RENE", "amount": "215.00", "currency": "USD"}\n{"employee": "MIKE", "amount": "818.42", "currency": "USD"}\n',
+  }
+  for output_format in ioet.OUTPUT_FORMATS:
+   output_file = io.StringIO()
+   self.assertEqual(2, ioet.write_paychecks(paychecks, output_file, output_format))
+   self.assertEqual(expected[output_format], output_file.getvalue())
+
+ def test_write_paychecks_of_files_in_every_format(self):
+  payrolls = {'a.txt': {'RENE': 215}, 'b.txt': {'RENE': 30, 'KIM': 20}}
+  expected = {
+   'text': '==> a.txt <==\nThe amount to pay RENE is: 215.00 USD\n==> b.txt <==\nThe amount to pay RENE is: 30.00 USD\nThe amount to pay KIM is: 20.00 USD\n',
+   'csv': 'file,employee,amount,currency\na.txt,RENE,215.00,USD\nb.txt,RENE,30.00,USD\nb.txt,KIM,20.00,USD\n',
+   'jsonl': '{"file": "a.txt", "employee": "RENE", "amount": "215.00", "currency": "USD"}\n{"file": "b.txt", "employee": "RENE", "amount": "30.00", "currency": "USD"}\n{"file": "b.txt", "employee": "KIM", "amount": "20.00", "currency": "USD"}\n',
+  }
+  for output_format in ioet.OUTPUT_FORMATS:
+   output_file = io.StringIO()
+   self.assertEqual(3, ioet.write_paychecks_of_files(payrolls, output_file, output_format))
+   self.assertEqual(expected[output_format], output_file.getvalue())
+
+ def test_script_runs_the_payroll_module(self):
+  self.assertIs(sys.modules['ioet_python_challenge_payroll'], ioet)
+  directory = os.path.dirname(os.path.abspath(ioet.__file__))
+  run = subprocess.run([sys.executable, os.path.join(directory, 'ioet_python_challenge.py'), 'ioet_challenge_test_input_data.txt'], cwd=directory, capture_output=True, text=True, check=True)
+  self.assertEqual('The amount to pay RENE is: 215.00 USD\nThe amount to pay ASTRID is: 85.00 USD\nThe amount to pay MIKE is: 818.42 USD\nThe amount to pay LAURA is: 377.25 USD\nThe amount to pay KIM is: 430.00 USD\n', run.stdout)
+
+ def test_skipped_records_keep_csv_and_jsonl_output_valid(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'records.txt')
+   with open(filename, 'w') as input_file:
+    input_file.write("RENE=MO10:00-12:00,TU27:00-28:00\nASTRID=MO10:00-12:00\n")
+   for arguments in [['--format', 'csv'], ['--format', 'jsonl'], ['--format', 'csv', '--workers', '2'], ['--format', 'jsonl', '--mmap']]:
+    run = subprocess.run([sys.executable, os.path.join(os.path.dirname(ioet.__file__), 'ioet_python_challenge.py')] + arguments + [filename], capture_output=True, text=True, check=True)
+    if arguments[1] == 'csv':
+     rows = list(csv.reader(io.StringIO(run.stdout)))
+     self.assertEqual([['employee', 'amount', 'currency'], ['RENE', '30.00', 'USD'], ['ASTRID', '30.00', 'USD']], rows)
+    else:
+     self.assertEqual(['30.00', '30.00'], [json.loads(line)['amount'] for line in run.stdout.splitlines()])
+    self.assertIn('Skipping record:', run.stderr)
+
+ def test_write_paychecks_streams_batches(self):
+  output_file = io.StringIO()
+  def paychecks():
+   for employee in ['RENE', 'ASTRID', 'MIKE']:
+    yield (employee, 10)
+   self.assertEqual(2, output_file.getvalue().count('\n'))
+  self.assertEqual(3, ioet.write_paychecks(paychecks(), output_file, 'text', 2))
+  self.assertEqual(3, output_file.getvalue().count('\n'))
+
+ def test_payroll_server_prices_concurrent_clients_in_batches(self):
+  raw_records = ioet.read_input_file('ioet_challenge_test_input_data.txt')
+  expected = ioet.format_paychecks(list(ioet.get_weekly_payment_for_all_employees(ioet.get_data_from_input_file(raw_records)).items()), 'text')
+  async def run_clients():
+   payroll_server = ioet.PayrollServer(batch_window=0.05)
+   server = await payroll_server.start('127.0.0.1', 0)
+   port = server.sockets[0].getsockname()[1]
+   async with server:
+    replies = await asyncio.gather(*[ioet.request_payroll(raw_records, port=port) for _ in range(10)], ioet.request_payroll(['RENE=MO'], port=port))
+    statistics = json.loads(await ioet.request_payroll(['STATS'], port=port))
+   await payroll_server.stop()
+   return replies, statistics
+  replies, statistics = asyncio.run(run_clients())
+  self.assertEqual([expected]*10, replies[:10])
+  self.assertIn('does not comply', replies[10])
+  self.assertEqual(11, statistics['requests'])
+  self.assertLess(statistics['batches'], 11)
+  self.assertLessEqual(statistics['p50_ms'], statistics['p99_ms'])
+
+ def test_payroll_server_rejects_overlong_lines_and_stops_pricing(self):
+  async def run_clients():
+   payroll_server = ioet.PayrollServer(batch_window=0.01, line_limit=64)
+   server = await payroll_server.start('127.0.0.1', 0)
+   port = server.sockets[0].getsockname()[1]
+   async with server:
+    replies = [await ioet.request_payroll(['RENE=' + 'MO10:00-12:00,' * 20 + 'SU20:00-21:00'], port=port), await ioet.request_payroll(['RENE=MO10:00-12:00'], port=port)]
+    pricing_task = payroll_server.pricing_task
+   await payroll_server.stop()
+   return replies, pricing_task
+  replies, pricing_task = asyncio.run(run_clients())
+  self.assertTrue(replies[0].startswith('An error occurred during reading the timesheet:'))
+  self.assertEqual('The amount to pay RENE is: 30.00 USD\n', replies[1])
+  self.assertTrue(pricing_task.cancelled())
+
+ def test_payroll_server_reports_skipped_records_and_survives_cancelled_clients(self):
+  async def run_clients():
+   payroll_server = ioet.PayrollServer(batch_window=0.05)
+   server = await payroll_server.start('127.0.0.1', 0)
+   port = server.sockets[0].getsockname()[1]
+   async with server:
+    cancelled_payroll = asyncio.get_running_loop().create_future()
+    await payroll_server.pending_requests.put((['RENE=MO10:00-12:00'], cancelled_payroll))
+    cancelled_payroll.cancel()
+    reply = await asyncio.wait_for(ioet.request_payroll(['RENE=MO10:00-12:00,TU27:00-28:00'], port=port), 5)
+    pricing_task_alive = not payroll_server.pricing_task.done()
+   await payroll_server.stop()
+   return reply, pricing_task_alive
+  reply, pricing_task_alive = asyncio.run(run_clients())
+  self.assertEqual('The amount to pay RENE is: 30.00 USD\nSkipping record: TU27:00-28:00 Exception: 27 or 0 are out of bounds, check your input data file, please!\n', reply)
+  self.assertTrue(pricing_task_alive)
+
+ def test_serve_takes_no_filename(self):
+  with contextlib.redirect_stderr(io.StringIO()):
+   self.assertRaises(SystemExit, ioet.parse_cli_invocation, ['--serve', 'ioet_challenge_test_input_data.txt'])
+  self.assertTrue(ioet.parse_cli_invocation(['--serve']).serve)
+
+ def test_synthetic_timesheet_is_reproducible_and_compliant(self):
+  with tempfile.TemporaryDirectory() as directory:
+   timesheets = []
+   for filename in ['first.txt', 'second.txt']:
+    benchmark.generate_synthetic_timesheet(os.path.join(directory, filename), 300, 8, 0.5, 0.1, 0.2, 3)
+    timesheets.append(ioet.read_input_file(os.path.join(directory, filename)))
+  self.assertEqual(timesheets[0], timesheets[1])
+  self.assertEqual(300, len(timesheets[0]))
+  for raw_record in timesheets[0]:
+   self.assertTrue(ioet.check_raw_record(raw_record))
+  self.assertLess(len(ioet.get_data_from_input_file(timesheets[0])), 300)
+
+ def test_benchmark_stages_report(self):
+  with tempfile.TemporaryDirectory() as directory:
+   filename = os.path.join(directory, 'synthetic_timesheet.txt')
+   benchmark.generate_synthetic_timesheet(filename, 50, 4, duplicate_ratio=0)
+   report = benchmark.benchmark_stages(filename)
+  self.assertEqual(['read_input_file', 'get_data_from_input_file', 'get_weekly_payment_for_all_employees', 'print_paychecks'], list(report['stages']))
+  self.assertEqual((50, 200, 50), (report['lines'], report['shifts'], report['employees']))
+  self.assertGreater(report['total']['peak_memory_kb'], 0)
+
 if __name__ == '__main__':
  unittest.main()
\ No newline at end of file